@@ -0,0 +1,87 @@
+import os
+import sys
+
+# Appended, not prepended: this directory's own modules (e.g. config) must keep precedence
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_cache import LLMResponseCache
+from sound_relevance import SoundRelevanceClassifier
+
+
+# Same SQLite file as OpenAIClient's default (OPENAI_CACHE_PATH), so both share entries
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache.sqlite")
+CACHE_TTL = 30 * 24 * 3600  # Seconds before a cached response expires
+CACHE_MAX_ENTRIES = 100000  # Oldest entries are dropped beyond this
+USE_CACHE = True  # Set to False to always call the API
+
+_cache = None
+
+
+def _db():
+    """
+    Opens (once) the shared response cache.
+
+    :return: LLMResponseCache - Shared cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache(CACHE_PATH, CACHE_TTL, CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def cache_get(key):
+    """
+    Returns a cached value, or None when missing, expired or caching is off.
+
+    :param key: str - Cache key.
+    :return: str | None - Cached value.
+    """
+    if not USE_CACHE:
+        return None
+    return _db().get(key)
+
+
+def cache_put(key, value):
+    """
+    Stores a value and trims expired and least recently used entries.
+
+    :param key: str - Cache key.
+    :param value: str - Value to store.
+    """
+    if USE_CACHE:
+        _db().put(key, value)
+
+
+def relevance_key(model, tag):
+    """
+    Cache key of a tag's relevance decision, normalised like OpenAIClient's so both
+    clients read and write the same entry.
+
+    :param model: str - Model name.
+    :param tag: str - Raw tag.
+    :return: str - Cache key.
+    """
+    return f"relevance:{model}:{SoundRelevanceClassifier.normalize(tag)}"
+
+
+def cached_completion(client, model, messages, max_tokens):
+    """
+    Calls chat.completions.create unless the same request was answered before.
+
+    The key is built exactly like OpenAIClient's (model, whitespace-normalised messages,
+    max_tokens), so a request answered by either client is reused by the other.
+
+    :param client: OpenAI - Client instance.
+    :param model: str - Model name.
+    :param messages: list[dict] - Chat messages.
+    :param max_tokens: int - Completion token limit.
+    :return: str - Message content of the response.
+    """
+    key = LLMResponseCache.make_key(model=model, messages=messages, max_tokens=max_tokens)
+
+    content = cache_get(key)
+    if content is None:
+        response = client.chat.completions.create(model=model, messages=messages, max_tokens=max_tokens)
+        content = response.choices[0].message.content
+        cache_put(key, content)
+    return content
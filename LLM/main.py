@@ -1,3 +1,4 @@
+from cache import cache_get, cache_put, cached_completion, relevance_key
 from config import OPENAI_API_KEY
 from decorator import exponential_retry
 from openai import OpenAI
@@ -14,23 +15,35 @@ def get_sound_relevant_tags(tags):
     that produce recognizable sounds. Tags such as 'traffic lights' are excluded, as they do not
     generate sounds.
     
+    The decision for every tag is cached, so only tags that were never seen before are sent
+    to the model.
+    
     The function is decorated with @exponential_retry to handle API failures with exponential backoff.
     
     :param tags: list[str] - A list of tags to filter.
     :return: list[str] - A list of tags that correspond to real-world sounds.
     """
-    message = [
-        {"role": "system", "content": "You are an AI that filters tags to select only those associated with real-world sounds. Animals, people, cars, trees, hammers, wind, rain, whatever that can have a recognisable sound."},
-        {"role": "user", "content": f"Filter these tags and return only the ones that can have real sounds: {tags}. The return must contain only list of objects, separated by commas. Traffic lights do not give a sound."}
-    ]
+    decisions = {tag: cache_get(relevance_key("gpt-4o-mini", tag)) for tag in tags}
+    unknown = [tag for tag, decision in decisions.items() if decision is None]
+
+    if unknown:
+        message = [
+            {"role": "system", "content": "You are an AI that filters tags to select only those associated with real-world sounds. Animals, people, cars, trees, hammers, wind, rain, whatever that can have a recognisable sound."},
+            {"role": "user", "content": f"Filter these tags and return only the ones that can have real sounds: {unknown}. The return must contain only list of objects, separated by commas. Traffic lights do not give a sound."}
+        ]
+
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=message,
+            max_tokens=50
+        )
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=message,
-        max_tokens=50
-    )
+        relevant = {relevance_key("gpt-4o-mini", t) for t in response.choices[0].message.content.split(",")}
+        for tag in unknown:
+            decisions[tag] = "1" if relevance_key("gpt-4o-mini", tag) in relevant else "0"
+            cache_put(relevance_key("gpt-4o-mini", tag), decisions[tag])
 
-    my_list = response.choices[0].message.content.split(", ")
+    my_list = [tag for tag, decision in decisions.items() if decision == "1"]
     print(f"[INFO] Relevant Tags: {my_list}")
     return my_list
 
@@ -58,13 +71,7 @@ def generate_audio_prompts(tags):
             {"role": "user", "content": f"Generate a short prompt for Audio Model for this object: {tag}. Example response when the tag is person result should be: Sound for person laughing. When its car: Sound of loud car on the road."}
         ]
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=message,
-            max_tokens=10
-        )
-
-        prompts[tag] = response.choices[0].message.content
+        prompts[tag] = cached_completion(client, "gpt-4o-mini", message, max_tokens=10)
 
     print(f"[INFO] Prompts: {prompts}")
     return prompts
\ No newline at end of file
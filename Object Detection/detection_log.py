@@ -0,0 +1,168 @@
+import json
+import numpy as np
+
+
+# One row per detected box
+DETECTION_DTYPE = np.dtype([
+    ("frame", np.int32),
+    ("cls", np.int16),
+    ("conf", np.float32),
+    ("x1", np.float32), ("y1", np.float32), ("x2", np.float32), ("y2", np.float32),
+    ("track", np.int32),
+])
+INITIAL_CAPACITY = 4096  # Rows preallocated before the first doubling
+
+
+class DetectionLog:
+    """
+    Columnar record of every detection in a video.
+
+    Rows are appended one sampled frame at a time into a preallocated structured NumPy
+    array that doubles when full, so a crowded video costs 30 bytes per box instead of
+    a list of Python objects. Frames are appended in order, which keeps the "frame"
+    column sorted. The log is saved as a plain .npy (memory-mapped on load) with a small
+    JSON sidecar for fps, stride, frame count and class names, so intervals can be
+    recomputed with other thresholds without running the detector again.
+
+    :param fps: float - Frame rate of the video.
+    :param stride: int - Frames between detector runs.
+    :param names: dict - Class id to class name, e.g. model.names.
+    :param capacity: int - Rows to preallocate.
+    """
+    def __init__(self, fps, stride, names, capacity=INITIAL_CAPACITY):
+        self.fps = fps
+        self.stride = stride
+        self.names = dict(names)
+        self.frame_count = 0
+        self._rows = np.empty(capacity, dtype=DETECTION_DTYPE)
+        self._size = 0
+
+    @property
+    def rows(self):
+        return self._rows[:self._size]
+
+    def append(self, frame, cls, conf, xyxy, track=None):
+        """
+        Adds the detections of one sampled frame.
+
+        :param frame: int - Frame index (0-based), not lower than any appended before.
+        :param cls: numpy.ndarray - (n,) class ids.
+        :param conf: numpy.ndarray - (n,) confidences.
+        :param xyxy: numpy.ndarray - (n, 4) boxes.
+        :param track: numpy.ndarray | None - (n,) track ids, -1 when untracked.
+        """
+        n = len(cls)
+        if self._size + n > len(self._rows):
+            grown = np.empty(max(2 * len(self._rows), self._size + n), dtype=DETECTION_DTYPE)
+            grown[:self._size] = self.rows
+            self._rows = grown
+        rows = self._rows[self._size:self._size + n]
+        rows["frame"] = frame
+        rows["cls"] = cls
+        rows["conf"] = conf
+        for i, column in enumerate(("x1", "y1", "x2", "y2")):
+            rows[column] = xyxy[:, i]
+        rows["track"] = -1 if track is None else track
+        self._size += n
+
+    def at(self, frame):
+        """
+        :param frame: int - Frame index.
+        :return: numpy.ndarray - Rows of that frame.
+        """
+        frames = self.rows["frame"]
+        return self.rows[np.searchsorted(frames, frame, "left"):np.searchsorted(frames, frame, "right")]
+
+    def save(self, path):
+        """
+        Writes the rows to `path` (.npy) and the metadata to `path` + ".json".
+
+        :param path: str - Destination .npy file; the extension is added when missing.
+        :return: str - Path of the .npy file.
+        """
+        if not path.endswith(".npy"):
+            path += ".npy"
+        np.save(path, self.rows)
+        with open(f"{path}.json", "w") as f:
+            json.dump({"fps": self.fps, "stride": self.stride, "frame_count": self.frame_count,
+                       "rows": self._size, "names": {str(k): v for k, v in self.names.items()}}, f)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Opens a saved log.
+
+        :param path: str - .npy file written by save().
+        :param mmap: bool - Memory-map the rows instead of reading them.
+        :return: DetectionLog - The log.
+        """
+        if not path.endswith(".npy"):
+            path += ".npy"
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+        log = cls(meta["fps"], meta["stride"], {int(k): v for k, v in meta["names"].items()}, capacity=0)
+        log.frame_count = meta["frame_count"]
+        log._rows = np.load(path, mmap_mode="r" if mmap and meta["rows"] else None)
+        log._size = len(log._rows)
+        return log
+
+    def intervals(self, max_gap_s=None, min_conf=0.0):
+        """
+        Extracts on-screen intervals per class with vectorised run-length detection.
+
+        Each sampled frame stands for itself and the `stride - 1` skipped frames after it.
+        Consecutive samples of a class form one interval; a hole larger than the stride
+        (or `max_gap_s`, when larger) closes it. Several boxes of a class in one frame
+        count once. Frame i covers [i / fps, (i + 1) / fps).
+
+        :param max_gap_s: float | None - Longest hole in seconds still bridged.
+        :param min_conf: float - Ignore boxes below this confidence.
+        :return: dict - Class name to list of (start, end) times in seconds.
+        """
+        rows = self.rows
+        if min_conf > 0:
+            rows = rows[rows["conf"] >= min_conf]
+        if not len(rows):
+            return {}
+        gap = max(self.stride, round(max_gap_s * self.fps)) if max_gap_s else self.stride
+
+        # Unique (class, frame) pairs, sorted by class then frame
+        base = int(rows["frame"].max()) + 1
+        keys = np.unique(rows["cls"].astype(np.int64) * base + rows["frame"])
+        classes, frames = keys // base, keys % base
+
+        breaks = np.flatnonzero((np.diff(classes) != 0) | (np.diff(frames) > gap))
+        starts = np.r_[0, breaks + 1]
+        ends = np.r_[breaks, len(keys) - 1]
+        start_times = frames[starts] / self.fps
+        end_times = np.minimum(frames[ends] + self.stride, max(self.frame_count, base)) / self.fps
+
+        object_durations = {}
+        for c, start, end in zip(classes[starts].tolist(), start_times.tolist(), end_times.tolist()):
+            object_durations.setdefault(self.names[c], []).append((start, end))
+        return object_durations
+
+    def tracks(self):
+        """
+        Lists the on-screen span of every tracked object instance.
+
+        Object ids are "<class name>_<track id>", so two cars at once stay two objects.
+        A track covers its first to last sampled frame plus the stride after it.
+
+        :return: list[tuple] - (object_id, start, end) per track, times in seconds, as
+            expected by utils.group_object_detections.
+        """
+        rows = self.rows[self.rows["track"] >= 0]
+        if not len(rows):
+            return []
+        ids, first, inverse = np.unique(rows["track"], return_index=True, return_inverse=True)
+        last = np.zeros(len(ids), dtype=np.int64)
+        np.maximum.at(last, inverse, rows["frame"])
+        end_frame = max(self.frame_count, int(last.max()) + 1)
+        starts = rows["frame"][first] / self.fps
+        ends = np.minimum(last + self.stride, end_frame) / self.fps
+        return [
+            (f"{self.names[int(c)]}_{int(i)}", float(s), float(e))
+            for i, c, s, e in zip(ids, rows["cls"][first], starts, ends)
+        ]
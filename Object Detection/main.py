@@ -1,78 +1,309 @@
 from ultralytics import YOLO
 import cv2
+import queue
+import threading
 
+from detection_log import DetectionLog
+from tracker import IoUTracker, MAX_AGE_S
+
+
+BATCH_SIZE = 8  # Frames per forward pass
+FRAME_STRIDE = 1  # Run the detector on every n-th frame
+SAMPLE_FPS = None  # Detector runs per second of video; overrides FRAME_STRIDE when set
+MAX_PENDING_FRAMES = 120  # Frames held while a batch fills; a full buffer runs a smaller batch
+THREADED = True  # Decode, inference and encode on separate threads
+QUEUE_SIZE = 32  # Frames buffered between the reader, inference and writer threads
 
 model = YOLO("yolov8n.pt")
 
-def detect_and_track_objects(video_path, model, output_path="output_video.mp4"):
+
+def sampling_stride(fps, frame_stride=FRAME_STRIDE, sample_fps=SAMPLE_FPS):
+    """
+    Converts the sampling settings into a frame stride.
+
+    :param fps: float - Frame rate of the video.
+    :param frame_stride: int - Run the detector on every n-th frame.
+    :param sample_fps: float | None - Detector runs per second of video, takes precedence over frame_stride.
+    :return: int - Stride of at least 1.
+    """
+    if sample_fps:
+        return max(1, round(fps / sample_fps))
+    return max(1, int(frame_stride))
+
+
+def read_frames(cap, stride=1):
+    """
+    Decodes a video frame by frame.
+
+    Frames between samples are only grabbed, not decoded, which is much cheaper when
+    nothing needs to be drawn on them.
+
+    :param cap: cv2.VideoCapture - Opened video.
+    :param stride: int - Decode every n-th frame.
+    :return: generator - Yields (frame_index, frame), 0-based; frame is None for grabbed frames.
+    """
+    index = 0
+    while cap.isOpened():
+        if index % stride:
+            ret, frame = cap.grab(), None
+        else:
+            ret, frame = cap.read()
+        if not ret:
+            break
+        yield index, frame
+        index += 1
+
+
+def prefetch(items, maxsize=QUEUE_SIZE):
+    """
+    Runs an iterator on a background thread, at most `maxsize` items ahead of the consumer.
+
+    The bounded queue is the backpressure: the producer blocks while the consumer is behind.
+    An exception in the producer is re-raised in the consumer. When the generator is closed
+    early (close() or an exception in the consumer), the producer is stopped and joined, so
+    the source can be released safely afterwards.
+
+    :param items: iterable - Source, e.g. read_frames(cap).
+    :param maxsize: int - Items buffered between the threads.
+    :return: generator - Yields the items of `items` in order.
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in items:
+                buffer.put(item)
+                if stop.is_set():
+                    return
+        except BaseException as e:
+            buffer.put(e)
+        buffer.put(done)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        while thread.is_alive():  # Drain so a blocked put() returns and the producer sees stop
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+class FrameWriter:
+    """
+    Encodes frames on a background thread fed by a bounded queue.
+
+    :param out: cv2.VideoWriter - Opened writer; released by close().
+    :param maxsize: int - Frames buffered before write() blocks.
     """
-    Detects and tracks objects in a video without skipping frames.
-    
+    def __init__(self, out, maxsize=QUEUE_SIZE):
+        self.out = out
+        self.error = None
+        self._frames = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            frame = self._frames.get()
+            if frame is None:
+                return
+            if self.error is None:
+                try:
+                    self.out.write(frame)
+                except BaseException as e:
+                    self.error = e
+
+    def write(self, frame):
+        self._frames.put(frame)
+
+    def close(self):
+        """
+        Waits for queued frames to be written, releases the writer and re-raises a write error.
+        """
+        self._frames.put(None)
+        self._thread.join()
+        self.out.release()
+        if self.error is not None:
+            raise self.error
+
+
+def draw_boxes(frame, rows, names):
+    """
+    Draws detections onto a frame in place.
+
+    :param frame: numpy.ndarray - BGR frame.
+    :param rows: numpy.ndarray - DetectionLog rows of this frame.
+    :param names: dict - Class id to class name.
+    """
+    for row in rows:
+        x1, y1, x2, y2 = int(row["x1"]), int(row["y1"]), int(row["x2"]), int(row["y2"])
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        label = f"{names[int(row['cls'])]}" + (f" #{row['track']}" if row["track"] >= 0 else "")
+        cv2.putText(frame, f"{label} {row['conf']:.2f}", (x1, y1 - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+
+def render_detections(video_path, log_path, output_path="output_video.mp4", threaded=THREADED):
+    """
+    Draws the boxes of a saved detection log onto the video, without running the detector.
+
+    Frames between samples show the boxes of the latest sampled frame before them.
+
     :param video_path: str - Path to the input video file.
-    :param model: object - Object detection model compatible with the given input.
-    :param output_path: str - Path to save the processed video with bounding boxes.
-    :return: dict - Dictionary containing detected objects and their time intervals.
+    :param log_path: str - DetectionLog .npy saved by detect_and_track_objects.
+    :param output_path: str - Path to save the video with bounding boxes.
+    :param threaded: bool - Decode and encode on background threads.
+    :return: str - output_path.
     """
+    log = DetectionLog.load(log_path)
     cap = cv2.VideoCapture(video_path)
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")  
-    fps = int(cap.get(cv2.CAP_PROP_FPS))  
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))  
+    out = cv2.VideoWriter(output_path, fourcc, cap.get(cv2.CAP_PROP_FPS), (width, height))
+    writer = FrameWriter(out) if threaded else out
 
-    detected_objects = {}  # Dictionary to store object appearance intervals
-    frame_number = 0
+    frames = prefetch(read_frames(cap)) if threaded else read_frames(cap)
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break  
+    rows = log.at(-1)
+    try:
+        for index, frame in frames:
+            if index % log.stride == 0:
+                rows = log.at(index)
+            draw_boxes(frame, rows, log.names)
+            writer.write(frame)
+    finally:
+        frames.close()  # Stops the reader thread before the capture is released
+        cap.release()
+        if threaded:
+            writer.close()
+        else:
+            out.release()
+    return output_path
+
+
+def detect_and_track_objects(video_path, model, output_path="output_video.mp4",
+                             batch_size=BATCH_SIZE, frame_stride=FRAME_STRIDE, sample_fps=SAMPLE_FPS,
+                             threaded=THREADED, log_path=None, per_object=False):
+    """
+    Detects and tracks objects in a video.
+
+    The detector runs on every `frame_stride`-th frame (or `sample_fps` times per second of
+    video) and takes `batch_size` sampled frames per forward pass. Skipped frames are written
+    with the boxes of the latest sampled frame before them.
 
-        frame_number += 1  # Track current frame number
+    With `threaded` decoding and encoding run on their own threads around the inference loop,
+    connected by bounded queues so memory stays flat; the output is the same as the serial loop.
 
-        # Detect objects
-        results = model(frame)
+    With `output_path=None` nothing is drawn or encoded and skipped frames are not even
+    decoded. Every box is recorded in a columnar DetectionLog; pass `log_path` to keep it,
+    then render_detections can draw the annotated video and DetectionLog.intervals can
+    re-derive intervals with other thresholds, both without running the detector.
+
+    Every detection also gets a track id from an IoUTracker, so concurrent instances of a
+    class are told apart. With `per_object` the result is one (object_id, start, end) per
+    tracked instance, ready for utils.group_object_detections.
+
+    :param video_path: str - Path to the input video file.
+    :param model: object - Object detection model compatible with the given input.
+    :param output_path: str | None - Path to save the processed video with bounding boxes, None for detection only.
+    :param batch_size: int - Sampled frames per forward pass.
+    :param frame_stride: int - Run the detector on every n-th frame.
+    :param sample_fps: float | None - Detector runs per second of video, takes precedence over frame_stride.
+    :param threaded: bool - Overlap decoding and encoding with inference.
+    :param log_path: str | None - Where to save the DetectionLog (.npy).
+    :param per_object: bool - Return per-instance tuples instead of per-class intervals.
+    :return: dict | list - Detected objects and their time intervals, or (object_id, start, end) tuples.
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    stride = sampling_stride(fps, frame_stride, sample_fps)
+    writer = None
+    if output_path is not None:
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        writer = FrameWriter(out) if threaded else out
+    frames = read_frames(cap, 1 if writer is not None else stride)
+    source = prefetch(frames) if threaded else frames
 
-        for result in results[0].boxes:  
-            x1, y1, x2, y2 = result.xyxy[0].tolist()  
-            conf = result.conf[0].item()  
-            cls = result.cls[0].item()  
-            class_name = model.names[int(cls)]  
+    log = DetectionLog(fps, stride, model.names)
+    tracker = IoUTracker(max(stride, round(MAX_AGE_S * fps)))
+    pending = []  # Frames read since the last forward pass
+    batch = []  # (frame_index, frame) to run the detector on
+    last_sample = -1  # Latest sampled frame, its boxes are drawn on the frames after it
+    frame_count = 0
 
-            # Track object appearance times
-            if class_name not in detected_objects:
-                detected_objects[class_name] = []
+    def flush():
+        nonlocal last_sample
+        if batch:
+            results = model([frame for _, frame in batch], verbose=False)
+            for (index, _), result in zip(batch, results):
+                boxes = result.boxes
+                cls, xyxy = boxes.cls.cpu().numpy(), boxes.xyxy.cpu().numpy()
+                log.append(index, cls, boxes.conf.cpu().numpy(), xyxy, tracker.update(index, cls, xyxy))
+            batch.clear()
 
-            detected_objects[class_name].append(frame_number / fps)  # Store timestamps
+        rows = log.at(last_sample)
+        for index, frame in pending:
+            if index % stride == 0:
+                last_sample = index
+                rows = log.at(index)
+            draw_boxes(frame, rows, log.names)  # Draw bounding box and label
+            writer.write(frame)
+        pending.clear()
 
-            # Draw bounding box and label
-            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-            cv2.putText(frame, f"{class_name} {conf:.2f}", (int(x1), int(y1) - 5),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    # Release the capture and finish the writer on every exit path, so an error in the model
+    # or while drawing leaves no blocked reader thread and a playable (partial) output file
+    try:
+        for frame_number, frame in source:
+            frame_count = frame_number + 1
+            if frame is None:
+                continue
+            if writer is not None:
+                pending.append((frame_number, frame))
+            if frame_number % stride == 0:
+                batch.append((frame_number, frame))
+                if len(batch) >= batch_size:
+                    flush()
+            elif len(pending) >= MAX_PENDING_FRAMES:
+                flush()
 
-        out.write(frame)  
+        flush()
+    finally:
+        source.close()  # Stops the reader thread before the capture is released
+        cap.release()
+        if writer is not None:
+            if threaded:
+                writer.close()
+            else:
+                out.release()
+    log.frame_count = frame_count
+    if log_path:
+        log.save(log_path)
 
-    cap.release()
-    out.release()
+    if per_object:
+        return log.tracks()
 
     # Convert detected frames to time intervals
-    object_durations = {}
-    for obj, times in detected_objects.items():
-        start_time = times[0]
-        duration = 0
-        intervals = []
-
-        for i in range(1, len(times)):
-            if times[i] - times[i - 1] > (1 / fps):  # If gap detected, close interval
-                intervals.append((start_time, times[i - 1]))
-                start_time = times[i]
-        intervals.append((start_time, times[-1]))  # Append last interval
-        
-        object_durations[obj] = intervals
+    object_durations = log.intervals()
 
     print("[INFO] Object screen times:")
     for obj, intervals in object_durations.items():
         for start, end in intervals:
             print(f"{obj}: {round(start, 2)}s - {round(end, 2)}s")
 
-    return object_durations  # Return intervals of object appearances
\ No newline at end of file
+    return object_durations  # Return intervals of object appearances
@@ -0,0 +1,99 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+IOU_THRESHOLD = 0.3  # Minimum overlap to continue a track
+CENTROID_THRESHOLD = 0.5  # Centroid shift, in track box diagonals, still accepted without overlap
+MAX_AGE_S = 1.0  # Seconds a track survives without a matching detection
+_NO_MATCH = 1e6  # Cost of pairs that must not be matched
+
+
+def iou_matrix(a, b):
+    """
+    Pairwise intersection over union of two sets of boxes.
+
+    :param a: numpy.ndarray - (n, 4) boxes as x1, y1, x2, y2.
+    :param b: numpy.ndarray - (m, 4) boxes as x1, y1, x2, y2.
+    :return: numpy.ndarray - (n, m) IoU values.
+    """
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class IoUTracker:
+    """
+    Lightweight multi-object tracker that gives every object instance its own id.
+
+    Detections of each sampled frame are matched to the live tracks of the same class by
+    an optimal assignment over one vectorised cost matrix: 1 - IoU for overlapping pairs,
+    and 1 + normalised centroid distance for pairs that moved too far to overlap (common
+    with a frame stride). Unmatched detections open new tracks; tracks unmatched for more
+    than `max_age` frames are dropped. Track state is kept in NumPy arrays, so an update
+    costs a few array operations plus one small assignment.
+
+    :param max_age: int - Frames a track survives without a match.
+    :param iou_threshold: float - Minimum IoU for an overlap match.
+    :param centroid_threshold: float - Maximum centroid shift, in track box diagonals, for a distance match.
+    """
+    def __init__(self, max_age, iou_threshold=IOU_THRESHOLD, centroid_threshold=CENTROID_THRESHOLD):
+        self.max_age = max_age
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.next_id = 0
+        self.ids = np.empty(0, dtype=np.int32)
+        self.cls = np.empty(0, dtype=np.int16)
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.last = np.empty(0, dtype=np.int32)
+
+    def _cost(self, cls, xyxy):
+        iou = iou_matrix(self.boxes, xyxy)
+        centers = (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+        diagonal = np.hypot(*(self.boxes[:, 2:] - self.boxes[:, :2]).T) + 1e-9
+        shift = np.linalg.norm(centers[:, None] - (xyxy[None, :, :2] + xyxy[None, :, 2:]) / 2, axis=2)
+        shift /= diagonal[:, None]
+        cost = np.where(iou >= self.iou_threshold, 1 - iou,
+                        np.where(shift <= self.centroid_threshold, 1 + shift, _NO_MATCH))
+        cost[self.cls[:, None] != cls[None, :]] = _NO_MATCH
+        return cost
+
+    def update(self, frame, cls, xyxy):
+        """
+        Assigns track ids to the detections of one sampled frame.
+
+        :param frame: int - Frame index, increasing between calls.
+        :param cls: numpy.ndarray - (n,) class ids.
+        :param xyxy: numpy.ndarray - (n, 4) boxes.
+        :return: numpy.ndarray - (n,) track ids.
+        """
+        alive = frame - self.last <= self.max_age
+        self.ids, self.cls = self.ids[alive], self.cls[alive]
+        self.boxes, self.last = self.boxes[alive], self.last[alive]
+
+        cls = np.asarray(cls).astype(np.int16)
+        xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        ids = np.full(len(cls), -1, dtype=np.int32)
+        if len(self.ids) and len(cls):
+            cost = self._cost(cls, xyxy)
+            rows, cols = linear_sum_assignment(cost)
+            matched = cost[rows, cols] < _NO_MATCH
+            rows, cols = rows[matched], cols[matched]
+            ids[cols] = self.ids[rows]
+            self.boxes[rows] = xyxy[cols]
+            self.last[rows] = frame
+
+        new = ids < 0
+        count = int(new.sum())
+        if count:
+            ids[new] = np.arange(self.next_id, self.next_id + count, dtype=np.int32)
+            self.next_id += count
+            self.ids = np.concatenate([self.ids, ids[new]])
+            self.cls = np.concatenate([self.cls, cls[new]])
+            self.boxes = np.concatenate([self.boxes, xyxy[new]])
+            self.last = np.concatenate([self.last, np.full(count, frame, dtype=np.int32)])
+        return ids
@@ -1,3 +1,6 @@
+from collections import defaultdict
+
+
 def filter_relevant_timings(object_timings, relevant_tags):
     """
     Filters the object timings dictionary to keep only relevant objects.
@@ -16,7 +19,8 @@ def group_object_detections(detections, min_gap=2.0, min_duration=1.0):
     they are treated as separate occurrences.
 
     Args:
-        detections (list of tuples): List of (object_id, start_time, end_time) detections.
+        detections (list of tuples): List of (object_id, start_time, end_time) detections,
+            e.g. DetectionLog.tracks() or detect_and_track_objects(..., per_object=True).
         min_gap (float): Maximum allowed gap (in seconds) to merge detections.
         min_duration (float): Minimum duration required to consider an object for audio generation.
     
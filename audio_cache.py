@@ -0,0 +1,136 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import soundfile as sf
+from typing import Any, Dict, List, Optional, Tuple
+
+from audio_clip import AudioClip
+
+class AudioClipCache:
+    """
+    Content-addressed on-disk cache for generated audio clips.
+
+    Entries are stored as `<cache_dir>/<key[:2]>/<key>.wav` where `key` is a
+    SHA-256 of the generation parameters. Writes go to a temp file in the
+    same directory and are moved into place atomically, so concurrent runs
+    never see a half-written clip. When the cache grows beyond `max_bytes`
+    the least recently used entries (by mtime, refreshed on every hit) are
+    removed.
+
+    Args:
+        cache_dir (str): Root directory for cached clips.
+        max_bytes (int): Size cap for the whole cache.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def make_key(**fields: Any) -> str:
+        """
+        Hashes generation parameters into a stable cache key.
+
+        Returns:
+            str: Hex SHA-256 of the JSON-encoded fields.
+        """
+        blob = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.wav")
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        """
+        Lists cached clips as (path, mtime, size).
+        """
+        entries: List[Tuple[str, float, int]] = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".wav"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, st.st_mtime, st.st_size))
+        return entries
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a cached clip and marks it as recently used.
+
+        Args:
+            key (str): Key from `make_key`.
+
+        Returns:
+            Optional[str]: Path of the cached .wav, or None on a miss.
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return path
+
+    def put(self, key: str, clip: AudioClip) -> str:
+        """
+        Atomically encodes an in-memory clip into the cache.
+
+        Args:
+            key (str): Key from `make_key`.
+            clip (AudioClip): Generated clip to store.
+
+        Returns:
+            str: Path of the cached file.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                sf.write(dst, clip.data, clip.sample_rate, format="WAV")
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._lock:
+            self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """
+        Removes least recently used clips until the cache fits `max_bytes`.
+        Caller must hold `_lock`.
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        self._size = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: hits, misses and current size in bytes.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes": self._size}
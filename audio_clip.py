@@ -0,0 +1,102 @@
+import itertools
+import numpy as np
+import soundfile as sf
+from math import gcd
+from scipy.signal import resample_poly
+from typing import Any, Dict, Optional
+
+# Source of AudioClip.version; unlike id() a value is never handed out twice.
+_versions = itertools.count()
+
+class AudioClip:
+    """
+    In-memory audio passed between generation, composition and merging.
+
+    Args:
+        data (np.ndarray): Waveform, (samples,) or (samples, channels).
+        sample_rate (int): Samples per second.
+        metadata (Dict[str, Any], optional): e.g. tag, prompt, duration, index.
+        path (str, optional): File the clip was read from or last written to.
+
+    Attributes:
+        version (int): Process-unique stamp of this clip, used as a change key.
+    """
+    def __init__(
+        self,
+        data: np.ndarray,
+        sample_rate: int,
+        metadata: Optional[Dict[str, Any]] = None,
+        path: Optional[str] = None
+    ):
+        data = np.asarray(data, dtype=np.float32)
+        if data.ndim == 1:
+            data = data[:, None]
+        self.data = data
+        self.sample_rate = sample_rate
+        self.metadata = metadata or {}
+        self.path = path
+        self._resampled: Dict[int, np.ndarray] = {}
+        self.version = next(_versions)
+
+    @property
+    def channels(self) -> int:
+        return self.data.shape[1]
+
+    @property
+    def seconds(self) -> float:
+        return len(self.data) / self.sample_rate
+
+    @classmethod
+    def read(cls, path: str, metadata: Optional[Dict[str, Any]] = None) -> "AudioClip":
+        """
+        Decodes an audio file into a clip.
+        """
+        data, sr = sf.read(path, dtype="float32", always_2d=True)
+        return cls(data, sr, metadata, path)
+
+    def write(self, path: str) -> str:
+        """
+        Encodes the clip to `path` and remembers it as the clip's file.
+
+        Returns:
+            str: `path`.
+        """
+        sf.write(path, self.data, self.sample_rate)
+        self.path = path
+        return path
+
+    def resampled(self, sample_rate: int) -> np.ndarray:
+        """
+        Returns the waveform at `sample_rate`, using a polyphase filter.
+
+        Results are cached per rate on the clip, so a clip placed on several
+        segments, or composed again, is only resampled once.
+
+        Returns:
+            np.ndarray: (samples, channels) float32 array.
+        """
+        if sample_rate == self.sample_rate:
+            return self.data
+        if sample_rate not in self._resampled:
+            g = gcd(sample_rate, self.sample_rate)
+            self._resampled[sample_rate] = resample_poly(
+                self.data, sample_rate // g, self.sample_rate // g, axis=0
+            ).astype(np.float32)
+        return self._resampled[sample_rate]
+
+def match_channels(data: np.ndarray, channels: int) -> np.ndarray:
+    """
+    Maps a (samples, channels) array onto `channels` output channels.
+
+    Mono is duplicated, a mono target gets the average, extra source
+    channels are dropped and missing ones repeat the source channels in order.
+
+    Returns:
+        np.ndarray: (samples, channels) array.
+    """
+    src = data.shape[1]
+    if src == channels:
+        return data
+    if src == 1 or channels == 1:
+        return np.broadcast_to(data.mean(axis=1, keepdims=True), (len(data), channels))
+    return data[:, np.arange(channels) % src]
@@ -1,10 +1,12 @@
+import os
 import torch
-import soundfile as sf
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from stable_audio import StableAudioPipeline
+from diffusers import StableAudioPipeline
 
 from config import StableAudioSettings
+from audio_cache import AudioClipCache
+from audio_clip import AudioClip
 
 class StableAudioClient:
     """
@@ -12,23 +14,189 @@ class StableAudioClient:
 
     Args:
         settings (StableAudioSettings): Model IDs, device, steps, etc.
+        pipe (StableAudioPipeline, optional): Already-loaded pipeline to reuse
+            instead of loading settings.model_id. Its clips are cached under the
+            model path it was loaded from; a pipeline without one is not cached.
     """
-    def __init__(self, settings: StableAudioSettings):
-        dtype = getattr(torch, settings.torch_dtype)
-        self.pipe = StableAudioPipeline.from_pretrained(
-            settings.model_id, torch_dtype=dtype
-        ).to(settings.device)
+    def __init__(
+        self,
+        settings: StableAudioSettings,
+        pipe: Optional[StableAudioPipeline] = None
+    ):
+        if pipe is None:
+            dtype = getattr(torch, settings.torch_dtype)
+            pipe = StableAudioPipeline.from_pretrained(
+                settings.model_id, torch_dtype=dtype
+            ).to(settings.device)
+            self.model_key = settings.model_id
+        else:
+            self.model_key = getattr(pipe.config, "_name_or_path", "") or ""
+        self.pipe = pipe
         self.generator = torch.Generator(settings.device).manual_seed(settings.seed)
         self.settings = settings
+        # Retry policy is built per instance so the attempt count comes from settings.
+        retrying = retry(
+            retry=retry_if_exception_type(Exception),
+            stop=stop_after_attempt(settings.retries),
+            wait=wait_exponential(multiplier=0.5, min=0.5, max=5),
+            reraise=True
+        )
+        self.generate_clips = retrying(self.generate_clips)
+        self._generate_batch = retrying(self._generate_batch)
+        self.cache: Optional[AudioClipCache] = None
+        if settings.use_cache and self.model_key:
+            self.cache = AudioClipCache(
+                settings.cache_dir, settings.cache_max_mb * 1024 * 1024
+            )
 
-    @retry(
-        retry=retry_if_exception_type(Exception),
-        stop=stop_after_attempt(lambda self: self.settings.samples_num),
-        wait=wait_exponential(multiplier=0.5, min=0.5, max=5),
-        reraise=True
-    )
-    def generate_audio_files(
+    def quantize_duration(self, duration: float) -> float:
+        """
+        Maps a requested duration to the generation length actually used.
+
+        With `settings.quantize_durations` this is the smallest bucket that
+        covers `duration` (or the largest bucket for longer requests), so the
+        composer can trim or loop the clip to the exact segment length.
+
+        Returns:
+            float: Duration in seconds to request from the model.
+        """
+        if not self.settings.quantize_durations or not self.settings.duration_buckets:
+            return duration
+        buckets = sorted(self.settings.duration_buckets)
+        for bucket in buckets:
+            if duration <= bucket:
+                return bucket
+        return buckets[-1]
+
+    @staticmethod
+    def _filename(tag: str, index: int, duration: float, output_dir: str = "") -> str:
+        return os.path.join(output_dir, f"{tag}_{index}_{duration}s.wav")
+
+    def _cache_keys(self, prompt: str, duration: float) -> List[str]:
+        """
+        Builds one cache key per requested sample of a prompt.
+        """
+        s = self.settings
+        return [
+            AudioClipCache.make_key(
+                prompt=prompt,
+                negative_prompt=s.negative_prompt,
+                duration=round(duration, 2),
+                seed=s.seed,
+                model_id=self.model_key,
+                torch_dtype=s.torch_dtype,
+                num_inference_steps=s.num_inference_steps,
+                sample=i,
+            )
+            for i in range(s.samples_num)
+        ]
+
+    def _load_cached(
         self, tag: str, prompt: str, duration: float
+    ) -> Optional[List[AudioClip]]:
+        """
+        Decodes cached clips for `prompt`.
+
+        Returns:
+            Optional[List[AudioClip]]: Clips, or None unless every sample is cached.
+        """
+        if self.cache is None:
+            return None
+        cached = [self.cache.get(k) for k in self._cache_keys(prompt, duration)]
+        if any(path is None for path in cached):
+            return None
+        return [
+            AudioClip.read(path, {"tag": tag, "prompt": prompt, "duration": duration, "index": i})
+            for i, path in enumerate(cached)
+        ]
+
+    def _store_cached(
+        self, prompt: str, duration: float, clips: List[AudioClip]
+    ) -> None:
+        if self.cache is None:
+            return
+        for key, clip in zip(self._cache_keys(prompt, duration), clips):
+            self.cache.put(key, clip)
+
+    def _to_clips(
+        self, tag: str, prompt: str, audios: torch.Tensor, duration: float
+    ) -> List[AudioClip]:
+        """
+        Trims waveforms to `duration` and wraps them as in-memory clips.
+
+        Args:
+            tag (str): Identifier stored in the clip metadata.
+            prompt (str): Prompt stored in the clip metadata.
+            audios (torch.Tensor): (n, channels, samples) waveforms for one prompt.
+            duration (float): Length in seconds to keep.
+
+        Returns:
+            List[AudioClip]: One clip per waveform.
+        """
+        sr = self.pipe.vae.sampling_rate
+        n_samples = int(round(duration * sr))
+        return [
+            AudioClip(
+                audio[:, :n_samples].T.float().cpu().numpy(), sr,
+                {"tag": tag, "prompt": prompt, "duration": duration, "index": i}
+            )
+            for i, audio in enumerate(audios)
+        ]
+
+    def write_clips(
+        self, clips: Dict[str, List[AudioClip]], output_dir: str = ""
+    ) -> Dict[str, List[str]]:
+        """
+        Writes clips as `{tag}_{i}_{duration}s.wav` files.
+
+        Args:
+            clips (Dict[str, List[AudioClip]]): Mapping tag→clips.
+            output_dir (str): Directory for the files; current directory if empty.
+
+        Returns:
+            Dict[str, List[str]]: Mapping tag→list of filenames.
+        """
+        return {
+            tag: [
+                clip.write(self._filename(tag, i, clip.metadata.get("duration", clip.seconds), output_dir))
+                for i, clip in enumerate(tag_clips)
+            ]
+            for tag, tag_clips in clips.items()
+        }
+
+    def generate_clips(
+        self, tag: str, prompt: str, duration: float
+    ) -> List[AudioClip]:
+        """
+        Generates one or more in-memory clips for a single prompt, reusing
+        cached clips when every requested sample is already on disk.
+
+        Args:
+            tag (str): Identifier stored in the clip metadata.
+            prompt (str): Text describing the sound to generate.
+            duration (float): Length in seconds to generate.
+
+        Returns:
+            List[AudioClip]: Generated clips.
+        """
+        duration = self.quantize_duration(duration)
+        cached = self._load_cached(tag, prompt, duration)
+        if cached is not None:
+            return cached
+        out = self.pipe(
+            prompt,
+            negative_prompt=self.settings.negative_prompt,
+            num_inference_steps=self.settings.num_inference_steps,
+            audio_end_in_s=duration,
+            num_waveforms_per_prompt=self.settings.samples_num,
+            generator=self.generator,
+        )
+        clips = self._to_clips(tag, prompt, out.audios, duration)
+        self._store_cached(prompt, duration, clips)
+        return clips
+
+    def generate_audio_files(
+        self, tag: str, prompt: str, duration: float, output_dir: str = ""
     ) -> List[str]:
         """
         Generates one or more audio files for a single prompt.
@@ -37,40 +205,129 @@ class StableAudioClient:
             tag (str): Identifier for naming files.
             prompt (str): Text describing the sound to generate.
             duration (float): Length in seconds to generate.
+            output_dir (str): Directory for the files; current directory if empty.
 
         Returns:
             List[str]: Filenames of generated .wav files.
         """
-        filenames: List[str] = []
-        for i in range(self.settings.samples_num):
-            out = self.pipe(
-                prompt,
-                negative_prompt=self.settings.negative_prompt,
-                num_inference_steps=self.settings.num_inference_steps,
-                audio_end_in_s=duration,
-                num_waveforms_per_prompt=1,
-                generator=self.generator,
-            )
-            wav = out.audios[0].T.cpu().numpy()
-            fname = f"{tag}_{i}_{duration}s.wav"
-            sf.write(fname, wav, self.pipe.vae.sampling_rate)
-            filenames.append(fname)
-        return filenames
+        clips = self.generate_clips(tag, prompt, duration)
+        return self.write_clips({tag: clips}, output_dir)[tag]
 
-    def generate_audio_for_tags(
+    def _plan_batches(
+        self, items: List[Tuple[str, str, float]]
+    ) -> List[List[Tuple[str, str, float]]]:
+        """
+        Groups (tag, prompt, duration) items into batches that fit the
+        configured memory budget.
+
+        Items are sorted longest first so each batch pads to a similar length.
+        A batch is closed once it holds `batch_size` prompts or adding another
+        prompt would exceed `batch_max_audio_s` of padded audio.
+
+        Returns:
+            List[List[Tuple[str, str, float]]]: Batches in generation order.
+        """
+        per_prompt = max(self.settings.samples_num, 1)
+        batches: List[List[Tuple[str, str, float]]] = []
+        current: List[Tuple[str, str, float]] = []
+        for item in sorted(items, key=lambda x: x[2], reverse=True):
+            # Sorted descending, so the first item sets the padded length.
+            longest = current[0][2] if current else item[2]
+            padded = (len(current) + 1) * per_prompt * longest
+            if current and (
+                len(current) >= self.settings.batch_size
+                or padded > self.settings.batch_max_audio_s
+            ):
+                batches.append(current)
+                current = []
+            current.append(item)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _generate_batch(
+        self, batch: List[Tuple[str, str, float]]
+    ) -> Dict[str, List[AudioClip]]:
+        """
+        Runs a single denoising loop for every prompt in `batch`.
+
+        The batch is padded to its longest duration and each waveform is
+        trimmed back to its own duration.
+
+        Args:
+            batch (List[Tuple[str, str, float]]): (tag, prompt, duration) items.
+
+        Returns:
+            Dict[str, List[AudioClip]]: Mapping tag→generated clips.
+        """
+        n = self.settings.samples_num
+        out = self.pipe(
+            [prompt for _, prompt, _ in batch],
+            negative_prompt=[self.settings.negative_prompt] * len(batch),
+            num_inference_steps=self.settings.num_inference_steps,
+            audio_end_in_s=max(duration for _, _, duration in batch),
+            num_waveforms_per_prompt=n,
+            generator=self.generator,
+        )
+        # Waveforms come back grouped by prompt: n consecutive per prompt.
+        generated: Dict[str, List[AudioClip]] = {}
+        for i, (tag, prompt, duration) in enumerate(batch):
+            clips = self._to_clips(tag, prompt, out.audios[i * n:(i + 1) * n], duration)
+            self._store_cached(prompt, duration, clips)
+            generated[tag] = clips
+        return generated
+
+    def generate_clips_for_tags(
         self, prompts: Dict[str, str], durations: Dict[str, float]
+    ) -> Dict[str, List[AudioClip]]:
+        """
+        Batch‐generates in-memory clips for all tags.
+
+        With `settings.batched` prompts are grouped by `_plan_batches` and each
+        group shares one denoising loop; otherwise one call is made per tag.
+
+        Args:
+            prompts (Dict[str, str]): Mapping tag→prompt.
+            durations (Dict[str, float]): Mapping tag→duration.
+
+        Returns:
+            Dict[str, List[AudioClip]]: Mapping tag→generated clips.
+        """
+        if not self.settings.batched:
+            return {
+                tag: self.generate_clips(tag, prompt, durations.get(tag, 3.0))
+                for tag, prompt in prompts.items()
+            }
+
+        generated: Dict[str, List[AudioClip]] = {}
+        items: List[Tuple[str, str, float]] = []
+        for tag, prompt in prompts.items():
+            duration = self.quantize_duration(durations.get(tag, 3.0))
+            cached = self._load_cached(tag, prompt, duration)
+            if cached is not None:
+                generated[tag] = cached
+            else:
+                items.append((tag, prompt, duration))
+        for batch in self._plan_batches(items):
+            generated.update(self._generate_batch(batch))
+        # Preserve the caller's tag order.
+        return {tag: generated[tag] for tag in prompts}
+
+    def generate_audio_for_tags(
+        self,
+        prompts: Dict[str, str],
+        durations: Dict[str, float],
+        output_dir: str = ""
     ) -> Dict[str, List[str]]:
         """
-        Batch‐generates audio for all tags.
+        Batch‐generates audio files for all tags; see generate_clips_for_tags.
 
         Args:
             prompts (Dict[str, str]): Mapping tag→prompt.
             durations (Dict[str, float]): Mapping tag→duration.
+            output_dir (str): Directory for the files; current directory if empty.
 
         Returns:
             Dict[str, List[str]]: Mapping tag→list of generated filenames.
         """
-        return {
-            tag: self.generate_audio_files(tag, prompt, durations.get(tag, 3.0))
-            for tag, prompt in prompts.items()
-        }
+        return self.write_clips(self.generate_clips_for_tags(prompts, durations), output_dir)
@@ -0,0 +1,244 @@
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from config import (
+    GeminiSettings, OpenAISettings, StableAudioSettings, ComposerSettings, BatchSettings
+)
+from pipeline import FullVideoAudioPipeline
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+def collect_videos(source: str) -> List[str]:
+    """
+    Lists the videos to process.
+
+    Args:
+        source (str): A directory (every video file in it, sorted) or a
+            manifest file with one video path per line, or JSONL lines with a
+            'video' key. Relative manifest paths resolve against the manifest.
+
+    Returns:
+        List[str]: Video paths.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        )
+    base = os.path.dirname(os.path.abspath(source))
+    videos: List[str] = []
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = json.loads(line)["video"] if line.startswith("{") else line
+            videos.append(os.path.join(base, path))
+    return videos
+
+class BatchRunner:
+    """
+    Runs many videos through one warm FullVideoAudioPipeline.
+
+    Network-bound stages (Gemini analysis, OpenAI filtering and prompts) run
+    for `network_workers` videos at once. Prepared videos go into a bounded
+    queue drained by a single GPU thread, since the diffusers pipeline and
+    its Generator are not thread-safe. Finished audio is composed and merged
+    on `cpu_workers` threads; at most `queue_size` generated videos wait for
+    them, so a slow compose/merge stage holds generation back instead of
+    piling up clips in memory. Every video gets one line in the JSONL
+    results manifest.
+
+    Args:
+        pipeline (FullVideoAudioPipeline): Pipeline whose clients are shared.
+        settings (BatchSettings): Worker counts and output locations.
+    """
+    def __init__(self, pipeline: FullVideoAudioPipeline, settings: BatchSettings):
+        self.pipeline = pipeline
+        self.settings = settings
+        self._manifest_lock = threading.Lock()
+
+    def _video_dir(self, video_path: str) -> str:
+        """
+        Output directory of one video: its name plus a hash of its absolute
+        path, so same-named videos from different folders do not collide.
+        """
+        stem = os.path.splitext(os.path.basename(video_path))[0]
+        digest = hashlib.sha1(os.path.abspath(video_path).encode("utf-8")).hexdigest()[:8]
+        path = os.path.join(self.settings.output_dir, f"{stem}_{digest}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _prepare(self, video_path: str) -> Dict[str, Any]:
+        """
+        Network stage: analysis, relevance filter and prompts for one video.
+
+        Returns:
+            Dict[str, Any]: Job with prompts, durations, timings and stage times.
+        """
+        p = self.pipeline
+        times: Dict[str, float] = {}
+        t = time.perf_counter()
+        objects = p.analyzer.analyze(video_path)["objects"]
+        times["analyze"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        labels   = [o["label"] for o in objects]
+        tags     = p.openai.get_sound_relevant_tags(labels)
+        relevant = [o for o in objects if o["label"] in tags]
+        times["filter"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        prompts = p.openai.generate_audio_prompts_from_objects(relevant)
+        times["prompts"] = time.perf_counter() - t
+
+        return {
+            "video": video_path,
+            "dir": self._video_dir(video_path),
+            "prompts": prompts,
+            "durations": p._extract_durations(relevant),
+            "timings": p._extract_timings(relevant),
+            "video_duration": p._get_video_duration(video_path),
+            "times": times,
+        }
+
+    def _generate(self, job: Dict[str, Any]) -> None:
+        """
+        GPU stage: in-memory clips for every prompt of one video.
+        """
+        t = time.perf_counter()
+        job["clips"] = self.pipeline.audio.generate_clips_for_tags(
+            job["prompts"], job["durations"]
+        )
+        job["times"]["audio"] = time.perf_counter() - t
+
+    def _finish(self, job: Dict[str, Any]) -> str:
+        """
+        CPU stage: compose the track into the video's directory and merge it
+        with the video. With COMPOSER_STREAMING the track is rendered block
+        by block, so memory does not grow with the video length.
+
+        Returns:
+            str: Path to the final video.
+        """
+        c = self.pipeline.composer
+        t = time.perf_counter()
+        wav = c.compose_final_audio(
+            job["clips"], job["timings"], job["video_duration"],
+            os.path.join(job["dir"], "audio.wav")
+        )
+        job.pop("clips")
+        job["times"]["compose"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        final = c.merge_audio_with_video(
+            job["video"], wav, os.path.join(job["dir"], "video_with_audio.mp4")
+        )
+        job["times"]["merge"] = time.perf_counter() - t
+        return final
+
+    def _record(
+        self,
+        video_path: str,
+        status: str,
+        times: Dict[str, float],
+        output: Optional[str] = None,
+        error: Optional[BaseException] = None
+    ) -> Dict[str, Any]:
+        """
+        Appends one result line to the manifest.
+
+        Returns:
+            Dict[str, Any]: The written record.
+        """
+        record = {
+            "video": video_path,
+            "status": status,
+            "output": output,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "timings": {k: round(v, 3) for k, v in times.items()},
+        }
+        manifest = os.path.join(self.settings.output_dir, self.settings.manifest_filename)
+        with self._manifest_lock, open(manifest, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def run(self, videos: List[str]) -> List[Dict[str, Any]]:
+        """
+        Processes all videos and writes the results manifest.
+
+        Args:
+            videos (List[str]): Input video paths.
+
+        Returns:
+            List[Dict[str, Any]]: One record per video, in completion order.
+        """
+        os.makedirs(self.settings.output_dir, exist_ok=True)
+        s = self.settings
+        work: "queue.Queue" = queue.Queue(maxsize=max(s.queue_size, 1))
+        # Slots for generated videos being composed or waiting to be composed
+        finishing = threading.BoundedSemaphore(max(s.cpu_workers, 1) + max(s.queue_size, 1))
+        records: List[Dict[str, Any]] = []
+
+        def done(job: Dict[str, Any], future) -> None:
+            try:
+                records.append(self._record(job["video"], "ok", job["times"], future.result()))
+            except Exception as e:
+                records.append(self._record(job["video"], "error", job["times"], error=e))
+            finally:
+                finishing.release()
+
+        def gpu_worker(cpu_pool: ThreadPoolExecutor) -> None:
+            while True:
+                job = work.get()
+                if job is None:
+                    return
+                try:
+                    self._generate(job)
+                except Exception as e:
+                    records.append(self._record(job["video"], "error", job["times"], error=e))
+                    continue
+                finishing.acquire()
+                future = cpu_pool.submit(self._finish, job)
+                future.add_done_callback(lambda f, job=job: done(job, f))
+
+        with ThreadPoolExecutor(max_workers=max(s.cpu_workers, 1)) as cpu_pool:
+            gpu_thread = threading.Thread(target=gpu_worker, args=(cpu_pool,), daemon=True)
+            gpu_thread.start()
+
+            with ThreadPoolExecutor(max_workers=max(s.network_workers, 1)) as net_pool:
+                futures = {net_pool.submit(self._prepare, v): v for v in videos}
+                for future in as_completed(futures):
+                    try:
+                        work.put(future.result())
+                    except Exception as e:
+                        records.append(self._record(futures[future], "error", {}, error=e))
+
+            work.put(None)
+            gpu_thread.join()
+        return records
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate audio for a batch of silent videos.")
+    parser.add_argument("source", help="Directory of videos or manifest file (paths or JSONL).")
+    args = parser.parse_args(argv)
+
+    pipeline = FullVideoAudioPipeline(
+        GeminiSettings(), OpenAISettings(), StableAudioSettings(), ComposerSettings()
+    )
+    runner = BatchRunner(pipeline, BatchSettings())
+    records = runner.run(collect_videos(args.source))
+    failed = sum(r["status"] != "ok" for r in records)
+    print(f"[INFO] Processed {len(records)} videos, {failed} failed.")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
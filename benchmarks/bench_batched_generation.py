@@ -0,0 +1,131 @@
+"""
+CPU benchmark: per-tag vs batched StableAudio generation.
+
+Builds a tiny randomly initialised StableAudioPipeline (same shape as the
+diffusers test fixtures) so it runs on CPU in seconds, then times
+StableAudioClient.generate_audio_for_tags with batching off and on.
+
+Usage:
+    python benchmarks/bench_batched_generation.py --tags 15 --steps 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import torch
+from diffusers import (
+    AutoencoderOobleck,
+    CosineDPMSolverMultistepScheduler,
+    StableAudioDiTModel,
+    StableAudioPipeline,
+    StableAudioProjectionModel,
+)
+from transformers import T5EncoderModel, T5Tokenizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import StableAudioSettings
+from audio_generation import StableAudioClient
+
+
+def build_tiny_pipeline() -> StableAudioPipeline:
+    """
+    Returns a randomly initialised StableAudioPipeline small enough for CPU.
+    """
+    torch.manual_seed(0)
+    transformer = StableAudioDiTModel(
+        sample_size=64,
+        in_channels=3,
+        num_layers=2,
+        attention_head_dim=4,
+        num_key_value_attention_heads=2,
+        out_channels=3,
+        cross_attention_dim=4,
+        time_proj_dim=8,
+        global_states_input_dim=8,
+        cross_attention_input_dim=4,
+    )
+    scheduler = CosineDPMSolverMultistepScheduler(
+        solver_order=2,
+        prediction_type="v_prediction",
+        sigma_data=1.0,
+        sigma_schedule="exponential",
+    )
+    vae = AutoencoderOobleck(
+        encoder_hidden_size=6,
+        downsampling_ratios=[1, 2],
+        decoder_channels=3,
+        decoder_input_channels=3,
+        audio_channels=2,
+        channel_multiples=[2, 4],
+        sampling_rate=16,
+    )
+    t5_repo_id = "hf-internal-testing/tiny-random-T5ForConditionalGeneration"
+    text_encoder = T5EncoderModel.from_pretrained(t5_repo_id)
+    tokenizer = T5Tokenizer.from_pretrained(t5_repo_id, truncation=True, model_max_length=25)
+    projection_model = StableAudioProjectionModel(
+        text_encoder_dim=text_encoder.config.d_model,
+        conditioning_dim=4,
+        min_value=0,
+        max_value=32,
+    )
+    return StableAudioPipeline(
+        transformer=transformer,
+        scheduler=scheduler,
+        vae=vae,
+        text_encoder=text_encoder,
+        tokenizer=tokenizer,
+        projection_model=projection_model,
+    )
+
+
+def time_run(client: StableAudioClient, prompts, durations) -> float:
+    start = time.perf_counter()
+    client.generate_audio_for_tags(prompts, durations)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tags", type=int, default=15)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=1)
+    args = parser.parse_args()
+
+    pipe = build_tiny_pipeline()
+    prompts = {f"tag{i}": f"Sound of object number {i}" for i in range(args.tags)}
+    durations = {f"tag{i}": 1.0 + (i % 6) for i in range(args.tags)}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for batched in (False, True):
+                settings = StableAudioSettings(
+                    device="cpu",
+                    torch_dtype="float32",
+                    num_inference_steps=args.steps,
+                    samples_num=args.samples,
+                    batched=batched,
+                    batch_size=args.batch_size,
+                    use_cache=False,
+                )
+                client = StableAudioClient(settings, pipe=pipe)
+                time_run(client, {"warmup": "warmup"}, {"warmup": 1.0})
+                results[batched] = time_run(client, prompts, durations)
+        finally:
+            os.chdir(cwd)
+
+    per_tag = {k: v / args.tags * 1000 for k, v in results.items()}
+    print(f"tags={args.tags} steps={args.steps} batch_size={args.batch_size} samples={args.samples}")
+    print(f"per-tag  : {results[False]:.3f}s total, {per_tag[False]:.1f} ms/tag")
+    print(f"batched  : {results[True]:.3f}s total, {per_tag[True]:.1f} ms/tag")
+    print(f"speedup  : {results[False] / results[True]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+CPU benchmark: YOLO detection throughput against frame stride and batch size.
+
+Runs detect_and_track_objects from "Object Detection/main.py" on one video
+for every combination of --strides and --batch-sizes and reports video
+frames processed per second of wall time, plus the number of intervals
+found so sampling losses are visible next to the speedup.
+
+Usage:
+    python benchmarks/bench_detection_sampling.py video.mp4 --strides 1 2 5 --batch-sizes 1 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Object Detection"))
+
+from main import detect_and_track_objects, model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("video")
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    model.to("cpu")
+    cap = cv2.VideoCapture(args.video)
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "out.mp4")
+        detect_and_track_objects(args.video, model, out, batch_size=1, frame_stride=10)  # warmup
+
+        print(f"video={args.video} frames={frames} threads={args.threads}")
+        print(f"{'stride':>6} {'batch':>5} {'seconds':>8} {'fps':>8} {'intervals':>9}")
+        for stride in args.strides:
+            for batch_size in args.batch_sizes:
+                start = time.perf_counter()
+                found = detect_and_track_objects(args.video, model, out, batch_size=batch_size, frame_stride=stride)
+                elapsed = time.perf_counter() - start
+                intervals = sum(len(v) for v in found.values())
+                print(f"{stride:>6} {batch_size:>5} {elapsed:>8.2f} {frames / elapsed:>8.1f} {intervals:>9}")
+
+
+if __name__ == "__main__":
+    main()
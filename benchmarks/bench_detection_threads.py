@@ -0,0 +1,57 @@
+"""
+CPU benchmark: serial vs threaded decode/infer/encode in detect_and_track_objects.
+
+Runs "Object Detection/main.py" on one video with threaded off and on for
+each --batch-sizes value, and reports video frames per second of wall time
+and the speedup. Both runs must find the same intervals; a mismatch is
+reported.
+
+Usage:
+    python benchmarks/bench_detection_threads.py video.mp4 --stride 1 --batch-sizes 1 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Object Detection"))
+
+from main import detect_and_track_objects, model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("video")
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "out.mp4")
+        detect_and_track_objects(args.video, model, out, batch_size=1, frame_stride=10)  # warmup
+
+        print(f"video={args.video} frames={frames} stride={args.stride}")
+        for batch_size in args.batch_sizes:
+            results = {}
+            for threaded in (False, True):
+                start = time.perf_counter()
+                found = detect_and_track_objects(
+                    args.video, model, out,
+                    batch_size=batch_size, frame_stride=args.stride, threaded=threaded
+                )
+                results[threaded] = (time.perf_counter() - start, found)
+            (serial, a), (threaded, b) = results[False], results[True]
+            print(f"batch={batch_size:<3} serial {frames / serial:7.1f} fps | "
+                  f"threaded {frames / threaded:7.1f} fps | speedup {serial / threaded:.2f}x"
+                  + ("" if a == b else " | INTERVALS DIFFER"))
+
+
+if __name__ == "__main__":
+    main()
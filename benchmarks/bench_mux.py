@@ -0,0 +1,75 @@
+"""
+CPU benchmark: ffmpeg stream-copy mux vs moviepy re-encode.
+
+Times AudioComposer.merge_audio_with_video with mux_mode "copy" and
+"reencode" on the same silent video and audio track. Without --video a
+synthetic H.264 clip of --seconds length is rendered first, with a sine
+tone as the track.
+
+Usage:
+    python benchmarks/bench_mux.py --seconds 60
+    python benchmarks/bench_mux.py --video clip.mp4 --audio mix.wav
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from moviepy.editor import ColorClip
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ComposerSettings
+from audio_clip import AudioClip
+from composer import AudioComposer
+
+
+def make_inputs(tmp: str, seconds: float, sr: int):
+    """
+    Renders a silent test video and a matching sine-tone WAV.
+    """
+    video = os.path.join(tmp, "silent.mp4")
+    ColorClip((1280, 720), color=(40, 80, 120), duration=seconds).write_videofile(
+        video, fps=30, codec="libx264", audio=False, logger=None
+    )
+    t = np.arange(int(seconds * sr)) / sr
+    audio = AudioClip(0.2 * np.sin(2 * np.pi * 440 * t), sr).write(os.path.join(tmp, "mix.wav"))
+    return video, audio
+
+
+def time_run(mode: str, video: str, audio: str, out: str) -> float:
+    composer = AudioComposer(ComposerSettings(mux_mode=mode))
+    start = time.perf_counter()
+    composer.merge_audio_with_video(video, audio, out)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--video")
+    parser.add_argument("--audio")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.video and args.audio:
+            video, audio = args.video, args.audio
+        else:
+            video, audio = make_inputs(tmp, args.seconds, ComposerSettings().sample_rate)
+
+        results = {}
+        for mode in ("copy", "reencode"):
+            out = os.path.join(tmp, f"{mode}.mp4")
+            results[mode] = min(time_run(mode, video, audio, out) for _ in range(args.repeats))
+
+    print(f"video={args.video or f'synthetic {args.seconds:.0f}s 720p'} repeats={args.repeats}")
+    print(f"copy     : {results['copy']:.3f}s")
+    print(f"reencode : {results['reencode']:.3f}s")
+    print(f"speedup  : {results['reencode'] / results['copy']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import json
+import hashlib
+from typing import Any, Dict, Optional
+
+class RunCheckpoint:
+    """
+    Persists each pipeline stage's output in a per-run work directory.
+
+    Every stage is stored as `<root>/<run_id>/<stage>.json` and written
+    atomically, so a stage counts as completed exactly when its file exists.
+    With `root=None` checkpointing is disabled: nothing is loaded or saved
+    and `work_dir` and every `path()` are empty.
+
+    Args:
+        root (str, optional): Directory holding all run directories.
+        run_id (str): Identifier of this run, see `make_run_id`.
+    """
+    def __init__(self, root: Optional[str], run_id: str):
+        self.run_id = run_id
+        self.work_dir = os.path.join(root, run_id) if root else ""
+        if self.work_dir:
+            os.makedirs(self.work_dir, exist_ok=True)
+
+    @staticmethod
+    def make_run_id(content_digest: str, settings: Dict[str, Any]) -> str:
+        """
+        Derives a run id from the input content hash and the settings that
+        influence the output.
+
+        Returns:
+            str: Short hex id.
+        """
+        blob = json.dumps(
+            {"content": content_digest, "settings": settings},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+    def path(self, name: str) -> str:
+        """
+        Returns:
+            str: `name` inside the work directory, or "" when disabled.
+        """
+        return os.path.join(self.work_dir, name) if self.work_dir else ""
+
+    def has(self, stage: str) -> bool:
+        return bool(self.work_dir) and os.path.exists(self.path(f"{stage}.json"))
+
+    def load(self, stage: str) -> Optional[Any]:
+        """
+        Returns:
+            Optional[Any]: Saved output of `stage`, or None if not completed.
+        """
+        if not self.has(stage):
+            return None
+        with open(self.path(f"{stage}.json")) as f:
+            return json.load(f)
+
+    def save(self, stage: str, data: Any) -> None:
+        """
+        Atomically writes the output of `stage`.
+        """
+        if not self.work_dir:
+            return
+        target = self.path(f"{stage}.json")
+        tmp = f"{target}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, target)
@@ -1,11 +1,205 @@
 # composer.py
 
+import os
+import re
+import json
+import shutil
+import tempfile
+import subprocess
 import numpy as np
 import soundfile as sf
+from math import gcd
+from collections import OrderedDict
+from scipy.ndimage import minimum_filter1d, uniform_filter1d
 from moviepy.editor import VideoFileClip, AudioFileClip
-from typing import Dict, List, Tuple, Optional
+from moviepy.audio.AudioClip import AudioArrayClip
+from typing import Dict, List, Tuple, Optional, Union
 
 from config import ComposerSettings
+from audio_clip import AudioClip, match_channels
+
+# A generated clip, either already in memory or as a path to decode.
+ClipSource = Union[str, AudioClip]
+
+# Video codecs that can be stream-copied into each output container.
+STREAM_COPY_CODECS: Dict[str, Tuple[str, ...]] = {
+    ".mp4": ("h264", "hevc", "mpeg4", "av1", "vp9"),
+    ".m4v": ("h264", "hevc", "mpeg4"),
+    ".mov": ("h264", "hevc", "mpeg4", "prores", "mjpeg"),
+    ".mkv": ("h264", "hevc", "mpeg4", "av1", "vp8", "vp9", "prores", "mjpeg"),
+}
+
+def _loop_parts(audio: np.ndarray, crossfade: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits a clip into the head played once and the unit repeated after it
+    when looping, with the seam cross-fade baked into the unit.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (head, unit), both `n - fade` samples.
+    """
+    n = len(audio)
+    fade = min(crossfade, n // 2)
+    period = n - fade
+    # One loop unit: previous tail faded out over this head faded in,
+    # followed by the untouched middle of the clip.
+    ramp = np.linspace(0.0, 1.0, fade, endpoint=False, dtype=np.float32)
+    if audio.ndim > 1:
+        ramp = ramp[:, None]
+    seam = audio[n - fade:] * (1.0 - ramp) + audio[:fade] * ramp
+    return audio[:period], np.concatenate([seam, audio[fade:period]])
+
+def fit_to_length(audio: np.ndarray, length: int, crossfade: int) -> np.ndarray:
+    """
+    Trims or loops a clip to exactly `length` samples.
+
+    Longer clips are cut. Shorter clips are repeated, with the last
+    `crossfade` samples of each pass blended into the first samples of the
+    next so the seam does not click. Everything is built from whole-array
+    slices, no per-sample Python loop.
+
+    Args:
+        audio (np.ndarray): (samples,) or (samples, channels) clip.
+        length (int): Desired number of samples.
+        crossfade (int): Seam cross-fade length in samples.
+
+    Returns:
+        np.ndarray: Clip with exactly `length` samples along axis 0.
+    """
+    n = len(audio)
+    if n >= length or n == 0:
+        return audio[:length]
+    head, unit = _loop_parts(audio, crossfade)
+    period = len(head)
+    reps = -(-(length - period) // period)
+    return np.concatenate([head] + [unit] * reps)[:length]
+
+def _resampled_length(frames: int, src_rate: int, sample_rate: int) -> int:
+    """
+    Returns:
+        int: Length of `frames` samples after `AudioClip.resampled`.
+    """
+    g = gcd(src_rate, sample_rate)
+    up, down = sample_rate // g, src_rate // g
+    return -(-frames * up // down)
+
+def apply_fades(audio: np.ndarray, fade: int) -> np.ndarray:
+    """
+    Applies linear fade-in and fade-out of `fade` samples (at most half the
+    clip each) to a (samples, channels) array in place.
+
+    Returns:
+        np.ndarray: `audio`.
+    """
+    n = min(fade, len(audio) // 2)
+    if n > 0:
+        ramp = np.linspace(0.0, 1.0, n, endpoint=False, dtype=np.float32)[:, None]
+        audio[:n] *= ramp
+        audio[-n:] *= ramp[::-1]
+    return audio
+
+def normalize_gain(rms: float, settings: ComposerSettings) -> float:
+    """
+    Gain bringing a clip of level `rms` to `settings.target_rms_db`, capped
+    at `max_normalize_gain_db`. Clips at or below `normalize_gate_db` are
+    near-silent and left as they are rather than boosting their noise floor.
+
+    Returns:
+        float: Linear gain.
+    """
+    if rms <= 10 ** (settings.normalize_gate_db / 20):
+        return 1.0
+    target = 10 ** (settings.target_rms_db / 20)
+    return min(target / rms, 10 ** (settings.max_normalize_gain_db / 20))
+
+def lookahead_limit(
+    track: np.ndarray,
+    sr: int,
+    threshold_db: float,
+    lookahead_s: float,
+    release_s: float
+) -> np.ndarray:
+    """
+    Look-ahead peak limiter for a (samples, channels) track.
+
+    The gain needed to keep each sample under the ceiling is spread with a
+    running minimum over lookahead+release on both sides, then smoothed by a
+    moving average over the release window. The smoothing window is inside
+    the minimum window, so the smoothed gain never exceeds the gain needed at
+    any sample: no overs, and no per-sample Python loop.
+
+    Returns:
+        np.ndarray: Limited track.
+    """
+    ceiling = 10 ** (threshold_db / 20)
+    peak = np.abs(track).max(axis=1)
+    needed = np.minimum(1.0, ceiling / np.maximum(peak, 1e-12)).astype(np.float32)
+    if needed.min() >= 1.0:
+        return track
+    ahead = max(int(lookahead_s * sr), 1)
+    release = max(int(release_s * sr), 1)
+    gain = minimum_filter1d(needed, size=2 * (ahead + release) + 1, mode="nearest")
+    gain = uniform_filter1d(gain, size=2 * release + 1, mode="nearest")
+    return track * np.minimum(gain, needed)[:, None]
+
+class _StreamSegment:
+    """
+    One clip placed on the timeline of the streaming composer.
+
+    `read(offset, n)` returns the clip as it lands on the timeline (trimmed
+    or looped to its segment, channels matched, before gain and fades).
+    Files already at the output rate that need no looping are read block by
+    block with soundfile; anything else is decoded once on `open()`. Both
+    are released by `close()`, so only segments overlapping the current
+    block hold audio.
+
+    Args:
+        tag (str): Tag the clip belongs to.
+        source (ClipSource): Clip in memory or path to its file.
+        start (int): First timeline sample.
+        length (int): Samples placed on the timeline.
+        loop (bool): Whether the clip is looped to `length`.
+    """
+    def __init__(self, tag: str, source: ClipSource, start: int, length: int, loop: bool):
+        self.tag = tag
+        self.source = source
+        self.start = start
+        self.end = start + length
+        self.loop = loop
+        self.gain = 1.0
+        self._file: Optional[sf.SoundFile] = None
+        self._data: Optional[np.ndarray] = None
+        self._period = 0
+        self._channels = 0
+
+    def open(self, sr: int, channels: int, crossfade: int) -> None:
+        self._channels = channels
+        if isinstance(self.source, str) and not self.loop and sf.info(self.source).samplerate == sr:
+            self._file = sf.SoundFile(self.source)
+            return
+        clip = self.source if isinstance(self.source, AudioClip) else AudioClip.read(self.source)
+        data = match_channels(clip.resampled(sr), channels)
+        if self.loop and len(data) < self.end - self.start:
+            head, unit = _loop_parts(data, crossfade)
+            self._period = len(head)
+            data = np.concatenate([head, unit])
+        self._data = data
+
+    def read(self, offset: int, n: int) -> np.ndarray:
+        if self._file is not None:
+            self._file.seek(offset)
+            data = self._file.read(n, dtype="float32", always_2d=True)
+            return match_channels(data, self._channels)
+        idx = np.arange(offset, offset + n)
+        if self._period:
+            looped = idx >= self._period
+            idx[looped] = self._period + (idx[looped] - self._period) % self._period
+        return self._data[idx]
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._data = None
 
 class AudioComposer:
     """
@@ -16,19 +210,143 @@ class AudioComposer:
     """
     def __init__(self, settings: ComposerSettings):
         self.settings = settings
+        self._decoded: "OrderedDict[Tuple[str, float], AudioClip]" = OrderedDict()
+
+    def _load(self, source: ClipSource) -> AudioClip:
+        """
+        Returns a clip, decoding file paths through a small LRU so repeated
+        compositions reuse both the decoded and the resampled audio.
+        """
+        if isinstance(source, AudioClip):
+            return source
+        key = (os.path.abspath(source), os.path.getmtime(source))
+        clip = self._decoded.pop(key, None) or AudioClip.read(source)
+        self._decoded[key] = clip
+        while len(self._decoded) > self.settings.decode_cache_size:
+            self._decoded.popitem(last=False)
+        return clip
+
+    def compose_track(
+        self,
+        audio_files: Dict[str, List[ClipSource]],
+        timings: Dict[str, List[Tuple[float, float]]],
+        video_duration: float
+    ) -> AudioClip:
+        """
+        Mixes per-object clips onto a single in-memory timeline.
+
+        Clips are resampled to `settings.sample_rate` with a polyphase filter
+        and mapped onto `settings.channels` output channels; placement is
+        done with whole-array slices. Each placed clip is RMS-normalised,
+        scaled by its tag's gain and faded in/out, and the master bus goes
+        through a look-ahead limiter rather than a hard clip.
+
+        With `settings.loop_clips` each clip is trimmed or cross-fade looped
+        to its segment's length, so clips generated at quantised durations
+        still cover the exact on-screen interval.
+
+        Args:
+            audio_files (Dict[str, List[ClipSource]]): tag→list of clips or filepaths.
+            timings (Dict[str, List[Tuple[float,float]]]): tag→[(start,end),…].
+            video_duration (float): Total video length in seconds.
+
+        Returns:
+            AudioClip: The mixed track.
+        """
+        sr = self.settings.sample_rate
+        track = np.zeros((int(video_duration * sr), self.settings.channels), dtype=np.float32)
+        for tag, files in audio_files.items():
+            self.mix_tag(track, tag, files, timings.get(tag, []))
+        return self.master(track)
+
+    def place_tag(
+        self,
+        tag: str,
+        files: List[ClipSource],
+        segments: List[Tuple[float, float]],
+        total: int,
+        channels: int
+    ) -> List[Tuple[int, int, np.ndarray]]:
+        """
+        Renders one tag's clips as placed spans: resampled, channel matched,
+        optionally looped, RMS-normalised, gained and faded.
+
+        Args:
+            tag (str): Tag whose gain applies.
+            files (List[ClipSource]): Clips or filepaths, one per segment.
+            segments (List[Tuple[float, float]]): (start, end) in seconds.
+            total (int): Track length in samples; spans are cut to it.
+            channels (int): Channels of the track.
+
+        Returns:
+            List[Tuple[int, int, np.ndarray]]: (start, stop, samples) per clip,
+                to be added to `track[start:stop]`.
+        """
+        sr = self.settings.sample_rate
+        crossfade = int(self.settings.crossfade_s * sr)
+        fade = int(self.settings.fade_s * sr)
+        tag_gain = 10 ** (self.settings.tag_gains_db.get(tag, 0.0) / 20)
+        spans: List[Tuple[int, int, np.ndarray]] = []
+        for f, (start, end) in zip(files, segments):
+            audio = match_channels(self._load(f).resampled(sr), channels)
+            if self.settings.loop_clips:
+                audio = fit_to_length(audio, int((end - start) * sr), crossfade)
+            sidx = max(int(start*sr), 0)
+            eidx = min(sidx + len(audio), total)
+            if eidx <= sidx:
+                continue
+            audio = audio[: eidx - sidx]
+            gain = tag_gain
+            if self.settings.normalize_clips:
+                gain *= normalize_gain(float(np.sqrt(np.mean(np.square(audio)))), self.settings)
+            spans.append((sidx, eidx, apply_fades(audio * np.float32(gain), fade)))
+        return spans
+
+    def mix_tag(
+        self,
+        track: np.ndarray,
+        tag: str,
+        files: List[ClipSource],
+        segments: List[Tuple[float, float]]
+    ) -> np.ndarray:
+        """
+        Adds one tag's clips (see place_tag) onto `track` in place.
+
+        Returns:
+            np.ndarray: `track`.
+        """
+        for sidx, eidx, samples in self.place_tag(tag, files, segments, len(track), track.shape[1]):
+            track[sidx:eidx] += samples
+        return track
+
+    def master(self, bus: np.ndarray) -> AudioClip:
+        """
+        Runs the summed mix through the limiter (or a hard clip).
+
+        Returns:
+            AudioClip: The final track; `bus` itself is left untouched.
+        """
+        if self.settings.limiter:
+            bus = lookahead_limit(
+                bus, self.settings.sample_rate,
+                self.settings.limiter_threshold_db,
+                self.settings.limiter_lookahead_s,
+                self.settings.limiter_release_s
+            )
+        return AudioClip(np.clip(bus, -1.0, 1.0), self.settings.sample_rate)
 
     def compose_final_audio(
         self,
-        audio_files: Dict[str, List[str]],
+        audio_files: Dict[str, List[ClipSource]],
         timings: Dict[str, List[Tuple[float, float]]],
         video_duration: float,
         output_filename: Optional[str] = None
     ) -> str:
         """
-        Mixes per-object WAV files onto a single timeline.
+        Mixes per-object clips onto a single timeline and writes it as WAV.
 
         Args:
-            audio_files (Dict[str, List[str]]): tag→list of filepaths.
+            audio_files (Dict[str, List[ClipSource]]): tag→list of clips or filepaths.
             timings (Dict[str, List[Tuple[float,float]]]): tag→[(start,end),…].
             video_duration (float): Total video length in seconds.
             output_filename (str, optional): Where to write final .wav.
@@ -37,43 +355,307 @@ class AudioComposer:
             str: Path to the combined WAV file.
         """
         out = output_filename or self.settings.default_audio_filename
+        if self.settings.streaming:
+            return self.compose_streaming(audio_files, timings, video_duration, out)
+        return self.compose_track(audio_files, timings, video_duration).write(out)
+
+    def _stream_segments(
+        self,
+        audio_files: Dict[str, List[ClipSource]],
+        timings: Dict[str, List[Tuple[float, float]]],
+        total: int
+    ) -> List[_StreamSegment]:
+        """
+        Builds the interval index: every placed clip with its timeline
+        span, sorted by start. Only file headers are read here.
+        """
         sr = self.settings.sample_rate
+        segments: List[_StreamSegment] = []
+        for tag, files in audio_files.items():
+            for f, (start, end) in zip(files, timings.get(tag, [])):
+                if isinstance(f, AudioClip):
+                    frames, rate = len(f.data), f.sample_rate
+                else:
+                    info = sf.info(f)
+                    frames, rate = info.frames, info.samplerate
+                n = _resampled_length(frames, rate, sr)
+                if n == 0:
+                    continue
+                length = int((end - start) * sr) if self.settings.loop_clips else n
+                sidx = max(int(start*sr), 0)
+                eidx = min(sidx + length, total)
+                if eidx > sidx:
+                    segments.append(_StreamSegment(tag, f, sidx, eidx - sidx, self.settings.loop_clips))
+        segments.sort(key=lambda seg: seg.start)
+        return segments
+
+    def compose_streaming(
+        self,
+        audio_files: Dict[str, List[ClipSource]],
+        timings: Dict[str, List[Tuple[float, float]]],
+        video_duration: float,
+        output_filename: str
+    ) -> str:
+        """
+        Renders the same mix as `compose_track` in fixed-size blocks, writing
+        each block to `output_filename` as soon as it is done.
+
+        Segments are swept in start order: a clip is opened when the first
+        block it overlaps is rendered and closed after the last one, so peak
+        memory is one block plus the clips sounding at that moment, whatever
+        the video length. Each block is rendered with enough extra context
+        on both sides for the look-ahead limiter to produce exactly the gain
+        it would on the whole track.
+
+        Args:
+            audio_files (Dict[str, List[ClipSource]]): tag→list of clips or filepaths.
+            timings (Dict[str, List[Tuple[float,float]]]): tag→[(start,end),…].
+            video_duration (float): Total video length in seconds.
+            output_filename (str): Where to write the .wav.
+
+        Returns:
+            str: `output_filename`.
+        """
+        s = self.settings
+        sr = s.sample_rate
+        channels = s.channels
         total = int(video_duration * sr)
-        track = np.zeros(total, dtype=np.float32)
+        crossfade = int(s.crossfade_s * sr)
+        fade = int(s.fade_s * sr)
+        block = max(int(s.stream_block_s * sr), 1)
+        pad = 0
+        if s.limiter:
+            release = max(int(s.limiter_release_s * sr), 1)
+            pad = max(int(s.limiter_lookahead_s * sr), 1) + 2 * release
 
-        for tag, files in audio_files.items():
-            segments = timings.get(tag, [])
-            for f, (start, end) in zip(files, segments):
-                audio, _ = sf.read(f)
-                if audio.ndim > 1:
-                    audio = audio.mean(axis=1)
-                sidx = int(start*sr)
-                eidx = min(sidx + len(audio), total)
-                track[sidx:eidx] += audio[: eidx - sidx]
-
-        track = np.clip(track, -1.0, 1.0)
-        sf.write(out, track, sr)
-        return out
+        segments = self._stream_segments(audio_files, timings, total)
+        active: List[_StreamSegment] = []
+        nxt = 0
+        with sf.SoundFile(output_filename, "w", samplerate=sr, channels=channels) as out:
+            for b0 in range(0, total, block):
+                b1 = min(b0 + block, total)
+                w0, w1 = max(b0 - pad, 0), min(b1 + pad, total)
+                while nxt < len(segments) and segments[nxt].start < w1:
+                    seg = segments[nxt]
+                    seg.open(sr, channels, crossfade)
+                    seg.gain = 10 ** (s.tag_gains_db.get(seg.tag, 0.0) / 20)
+                    if s.normalize_clips:
+                        length = seg.end - seg.start
+                        power = sum(
+                            float(np.square(seg.read(o, min(block, length - o))).sum())
+                            for o in range(0, length, block)
+                        )
+                        seg.gain *= normalize_gain(
+                            float(np.sqrt(power / (length * channels))), s
+                        )
+                    active.append(seg)
+                    nxt += 1
+                for seg in [seg for seg in active if seg.end <= w0]:
+                    seg.close()
+                    active.remove(seg)
+
+                window = np.zeros((w1 - w0, channels), dtype=np.float32)
+                for seg in active:
+                    o0, o1 = max(w0, seg.start), min(w1, seg.end)
+                    if o1 <= o0:
+                        continue
+                    length = seg.end - seg.start
+                    n = min(fade, length // 2)
+                    pos = np.arange(o0 - seg.start, o1 - seg.start)
+                    env = np.float32(seg.gain) * np.ones(len(pos), dtype=np.float32)
+                    if n > 0:
+                        env *= np.minimum(1.0, np.minimum(pos, length - 1 - pos) / n).astype(np.float32)
+                    window[o0 - w0:o1 - w0] += seg.read(pos[0], len(pos)) * env[:, None]
+
+                if s.limiter:
+                    window = lookahead_limit(
+                        window, sr, s.limiter_threshold_db,
+                        s.limiter_lookahead_s, s.limiter_release_s
+                    )
+                out.write(np.clip(window[b0 - w0:b1 - w0], -1.0, 1.0))
+        for seg in active:
+            seg.close()
+        return output_filename
+
+    def _ffmpeg(self) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: ffmpeg executable from settings, PATH, or the copy
+            bundled with moviepy's imageio-ffmpeg; None if none is found.
+        """
+        if self.settings.ffmpeg_binary:
+            return self.settings.ffmpeg_binary
+        found = shutil.which("ffmpeg")
+        if found:
+            return found
+        try:
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _video_codec(ffmpeg: str, video_path: str) -> Optional[str]:
+        """
+        Reads the first video stream's codec from ffmpeg's input banner.
+        """
+        probe = subprocess.run([ffmpeg, "-hide_banner", "-i", video_path], capture_output=True, text=True)
+        match = re.search(r"Stream #\d+:\d+.*?: Video: (\w+)", probe.stderr)
+        return match.group(1) if match else None
+
+    def _mux_stream_copy(self, video_path: str, audio_path: str, out: str) -> bool:
+        """
+        Muxes with ffmpeg, copying the video stream and encoding only audio.
+
+        Returns:
+            bool: False when ffmpeg is unavailable, the video codec cannot be
+            copied into `out`'s container, or ffmpeg fails.
+        """
+        ffmpeg = self._ffmpeg()
+        if ffmpeg is None:
+            return False
+        allowed = STREAM_COPY_CODECS.get(os.path.splitext(out)[1].lower(), ())
+        if self._video_codec(ffmpeg, video_path) not in allowed:
+            return False
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-i", video_path, "-i", audio_path,
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", self.settings.audio_codec, "-b:a", self.settings.audio_bitrate,
+            "-shortest", out,
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"[WARN] Stream-copy mux failed, re-encoding: {result.stderr.strip()}")
+            return False
+        return True
+
+    def _mux_reencode(self, video_path: str, audio_path: ClipSource, out: str) -> None:
+        """
+        Muxes with moviepy, decoding and re-encoding every video frame.
+        """
+        video = VideoFileClip(video_path)
+        if isinstance(audio_path, AudioClip):
+            audio = AudioArrayClip(audio_path.data, fps=audio_path.sample_rate)
+        else:
+            audio = AudioFileClip(audio_path)
+        video.set_audio(audio).write_videofile(out, codec="libx264", audio_codec="aac")
 
     def merge_audio_with_video(
         self,
         video_path: str,
-        audio_path: str,
+        audio_path: ClipSource,
         output_path: Optional[str] = None
     ) -> str:
         """
-        Attaches an audio file to a silent video.
+        Attaches an audio track to a silent video.
+
+        With `settings.mux_mode` "copy" the video stream is copied untouched
+        by ffmpeg and only the audio is encoded; the moviepy re-encode path
+        is used when that is not possible (no ffmpeg, a codec the container
+        cannot hold, or an ffmpeg error) or when mux_mode is "reencode".
 
         Args:
             video_path (str): Path to the original silent video.
-            audio_path (str): Path to the mixed audio .wav.
+            audio_path (ClipSource): Mixed track in memory, or path to its .wav.
             output_path (str, optional): Destination MP4 file.
 
         Returns:
             str: Path to the merged video.
         """
         out = output_path or self.settings.default_video_filename
-        video = VideoFileClip(video_path)
-        audio = AudioFileClip(audio_path)
-        video.set_audio(audio).write_videofile(out, codec="libx264", audio_codec="aac")
+        if self.settings.mux_mode == "copy":
+            if isinstance(audio_path, AudioClip):
+                fd, wav = tempfile.mkstemp(suffix=".wav")
+                os.close(fd)
+                try:
+                    sf.write(wav, audio_path.data, audio_path.sample_rate)
+                    copied = self._mux_stream_copy(video_path, wav, out)
+                finally:
+                    os.remove(wav)
+            else:
+                copied = self._mux_stream_copy(video_path, audio_path, out)
+            if copied:
+                return out
+        self._mux_reencode(video_path, audio_path, out)
         return out
+
+class StemMixer:
+    """
+    Keeps a mix split into per-tag stems so edits only redo what changed.
+
+    The first `mix()` renders every tag into its own stem and sums them
+    into a bus. A stem is kept as the placed (start, stop, samples) spans of
+    its clips rather than a full-length track, so memory grows with the
+    audio actually placed, not with tags times video length. Later calls
+    compare each tag's clips (paths with their mtimes, or the clip's
+    version stamp) and segments with the previous call: a changed tag has
+    its old spans subtracted from the bus and its new spans added,
+    unchanged tags are not touched. A different video length or
+    composer settings trigger a full recompose. One mixer holds one
+    session's track, so create one per user/video.
+
+    Args:
+        composer (AudioComposer): Composer whose settings and decode cache are used.
+    """
+    def __init__(self, composer: AudioComposer):
+        self.composer = composer
+        self.stems: Dict[str, List[Tuple[int, int, np.ndarray]]] = {}
+        self.bus: Optional[np.ndarray] = None
+        self._keys: Dict[str, Tuple] = {}
+        self._layout: Optional[Tuple] = None
+
+    @staticmethod
+    def _source_key(source: ClipSource) -> Tuple:
+        if isinstance(source, AudioClip):
+            return ("clip", source.version)
+        return ("file", os.path.abspath(source), os.path.getmtime(source))
+
+    def mix(
+        self,
+        audio_files: Dict[str, List[ClipSource]],
+        timings: Dict[str, List[Tuple[float, float]]],
+        video_duration: float
+    ) -> AudioClip:
+        """
+        Updates the stems for whatever changed and returns the mastered track.
+
+        Args:
+            audio_files (Dict[str, List[ClipSource]]): tag→list of clips or filepaths.
+            timings (Dict[str, List[Tuple[float,float]]]): tag→[(start,end),…].
+            video_duration (float): Total video length in seconds.
+
+        Returns:
+            AudioClip: The mixed track.
+        """
+        settings = self.composer.settings
+        total = int(video_duration * settings.sample_rate)
+        layout = (total, json.dumps(settings.dict(), sort_keys=True, default=str))
+        if layout != self._layout or self.bus is None:
+            self.stems, self._keys = {}, {}
+            self.bus = np.zeros((total, settings.channels), dtype=np.float32)
+            self._layout = layout
+
+        for tag in [t for t in self.stems if t not in audio_files]:
+            self._remove(tag)
+        for tag, files in audio_files.items():
+            segments = [tuple(seg) for seg in timings.get(tag, [])]
+            key = (tuple(self._source_key(f) for f in files), tuple(segments))
+            if self._keys.get(tag) == key:
+                continue
+            stem = self.composer.place_tag(tag, files, segments, total, settings.channels)
+            self._remove(tag)
+            for sidx, eidx, samples in stem:
+                self.bus[sidx:eidx] += samples
+            self.stems[tag] = stem
+            self._keys[tag] = key
+        return self.composer.master(self.bus)
+
+    def _remove(self, tag: str) -> None:
+        """
+        Subtracts a tag's spans from the bus and forgets the tag.
+        """
+        for sidx, eidx, samples in self.stems.pop(tag, []):
+            self.bus[sidx:eidx] -= samples
+        self._keys.pop(tag, None)
@@ -1,5 +1,5 @@
 from pydantic import BaseSettings, Field
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 class GeminiSettings(BaseSettings):
     """
@@ -13,6 +13,21 @@ class GeminiSettings(BaseSettings):
         retries (int): Number of retries on transient failures (env GEMINI_RETRIES).
         instructions (str): Natural‐language instructions for Gemini (env GEMINI_INSTRUCTIONS).
         response_schema (Dict[str, Any]): JSONschema to validate responses.
+        chunked_upload (bool): Use resumable chunked uploads instead of one multipart POST;
+            falls back to the POST if the server lacks /files/uploads (env GEMINI_CHUNKED_UPLOAD).
+        upload_chunk_mb (int): Chunk size in MiB for chunked uploads (env GEMINI_UPLOAD_CHUNK_MB).
+        upload_state_dir (str): Where upload offsets are persisted for resuming
+            (env GEMINI_UPLOAD_STATE_DIR).
+        use_cache (bool): Reuse uploads and analyses of identical videos (env GEMINI_USE_CACHE).
+        cache_dir (str): Directory for the upload and analysis caches (env GEMINI_CACHE_DIR).
+        file_ttl_s (int): Seconds an uploaded file_id is trusted; keep below the
+            server-side file expiry (env GEMINI_FILE_TTL_S).
+        analysis_ttl_s (int): Seconds a cached analysis stays valid (env GEMINI_ANALYSIS_TTL_S).
+        cache_max_entries (int): Row cap of each cache (env GEMINI_CACHE_MAX_ENTRIES).
+        poll_initial_s (float): First delay between activation polls (env GEMINI_POLL_INITIAL_S).
+        poll_max_s (float): Upper bound on the delay between polls (env GEMINI_POLL_MAX_S).
+        poll_multiplier (float): Backoff factor applied after each poll (env GEMINI_POLL_MULTIPLIER).
+        poll_jitter (float): Relative +/- jitter on each delay (env GEMINI_POLL_JITTER).
     """
     api_key: str = Field(..., env="GEMINI_API_KEY")
     base_url: str = Field("https://api.gemini.example.com", env="GEMINI_BASE_URL")
@@ -45,6 +60,18 @@ class GeminiSettings(BaseSettings):
             "required": ["objects", "summary"]
         }
     )
+    chunked_upload: bool = Field(False, env="GEMINI_CHUNKED_UPLOAD")
+    upload_chunk_mb: int = Field(8, env="GEMINI_UPLOAD_CHUNK_MB")
+    upload_state_dir: str = Field(".gemini_uploads", env="GEMINI_UPLOAD_STATE_DIR")
+    use_cache: bool = Field(True, env="GEMINI_USE_CACHE")
+    cache_dir: str = Field(".gemini_cache", env="GEMINI_CACHE_DIR")
+    file_ttl_s: int = Field(47 * 3600, env="GEMINI_FILE_TTL_S")
+    analysis_ttl_s: int = Field(30 * 24 * 3600, env="GEMINI_ANALYSIS_TTL_S")
+    cache_max_entries: int = Field(10_000, env="GEMINI_CACHE_MAX_ENTRIES")
+    poll_initial_s: float = Field(0.25, env="GEMINI_POLL_INITIAL_S")
+    poll_max_s: float = Field(10.0, env="GEMINI_POLL_MAX_S")
+    poll_multiplier: float = Field(2.0, env="GEMINI_POLL_MULTIPLIER")
+    poll_jitter: float = Field(0.2, env="GEMINI_POLL_JITTER")
 
 class OpenAISettings(BaseSettings):
     """
@@ -55,11 +82,30 @@ class OpenAISettings(BaseSettings):
         model (str): ChatCompletion model (env OPENAI_MODEL).
         retries (int): Retry attempts on OpenAI errors (env OPENAI_RETRIES).
         timeout (int): Request timeout in seconds (env OPENAI_TIMEOUT).
+        base_url (str): API base URL, e.g. a local stand-in server (env OPENAI_BASE_URL).
+        max_concurrency (int): Max in-flight requests for async calls (env OPENAI_MAX_CONCURRENCY).
+        batch_prompts (bool): Request prompts for many objects per call as JSON (env OPENAI_BATCH_PROMPTS).
+        prompt_batch_size (int): Max object keys per batched prompt request (env OPENAI_PROMPT_BATCH_SIZE).
+        use_cache (bool): Serve repeated requests from the local response cache (env OPENAI_USE_CACHE).
+        cache_path (str): SQLite file for the response cache (env OPENAI_CACHE_PATH).
+        cache_ttl_s (int): Seconds before a cached response expires (env OPENAI_CACHE_TTL_S).
+        cache_max_entries (int): Row cap of the response cache (env OPENAI_CACHE_MAX_ENTRIES).
+        use_local_relevance (bool): Resolve known labels offline before asking the LLM
+            (env OPENAI_USE_LOCAL_RELEVANCE).
     """
     api_key: str = Field(..., env="OPENAI_API_KEY")
     model: str = Field("gpt-4o-mini", env="OPENAI_MODEL")
     retries: int = Field(3, env="OPENAI_RETRIES")
     timeout: int = Field(60, env="OPENAI_TIMEOUT")
+    base_url: str = Field("https://api.openai.com/v1", env="OPENAI_BASE_URL")
+    max_concurrency: int = Field(8, env="OPENAI_MAX_CONCURRENCY")
+    batch_prompts: bool = Field(True, env="OPENAI_BATCH_PROMPTS")
+    prompt_batch_size: int = Field(25, env="OPENAI_PROMPT_BATCH_SIZE")
+    use_cache: bool = Field(True, env="OPENAI_USE_CACHE")
+    cache_path: str = Field(".llm_cache.sqlite", env="OPENAI_CACHE_PATH")
+    cache_ttl_s: int = Field(30 * 24 * 3600, env="OPENAI_CACHE_TTL_S")
+    cache_max_entries: int = Field(100_000, env="OPENAI_CACHE_MAX_ENTRIES")
+    use_local_relevance: bool = Field(True, env="OPENAI_USE_LOCAL_RELEVANCE")
 
 class StableAudioSettings(BaseSettings):
     """
@@ -73,6 +119,18 @@ class StableAudioSettings(BaseSettings):
         negative_prompt (str): Negative prompt text (env AUDIO_NEGATIVE_PROMPT).
         num_inference_steps (int): Diffusion steps (env AUDIO_INFERENCE_STEPS).
         seed (int): RNG seed (env AUDIO_SEED).
+        retries (int): Attempts per generation call on failures (env AUDIO_RETRIES).
+        batched (bool): Generate several prompts per denoising loop (env AUDIO_BATCHED).
+        batch_size (int): Max prompts per batched call (env AUDIO_BATCH_SIZE).
+        batch_max_audio_s (float): Max seconds of padded audio per batched call,
+            summed over prompts and waveforms; bounds device memory (env AUDIO_BATCH_MAX_AUDIO_S).
+        use_cache (bool): Reuse previously generated clips from disk (env AUDIO_USE_CACHE).
+        cache_dir (str): Directory of the on-disk clip cache (env AUDIO_CACHE_DIR).
+        cache_max_mb (int): Size cap of the clip cache in MiB (env AUDIO_CACHE_MAX_MB).
+        quantize_durations (bool): Generate only at `duration_buckets` lengths and let
+            the composer loop/trim to the exact segment; requires COMPOSER_LOOP_CLIPS
+            (env AUDIO_QUANTIZE_DURATIONS).
+        duration_buckets (List[float]): Allowed generation lengths in seconds (env AUDIO_DURATION_BUCKETS).
     """
     model_id: str = Field("stabilityai/stable-audio-open-1.0", env="AUDIO_MODEL_ID")
     torch_dtype: str = Field("float16", env="AUDIO_TORCH_DTYPE")
@@ -81,6 +139,17 @@ class StableAudioSettings(BaseSettings):
     negative_prompt: str = Field("Bad quality sound, not recognizable.", env="AUDIO_NEGATIVE_PROMPT")
     num_inference_steps: int = Field(40, env="AUDIO_INFERENCE_STEPS")
     seed: int = Field(0, env="AUDIO_SEED")
+    retries: int = Field(3, env="AUDIO_RETRIES")
+    batched: bool = Field(True, env="AUDIO_BATCHED")
+    batch_size: int = Field(8, env="AUDIO_BATCH_SIZE")
+    batch_max_audio_s: float = Field(240.0, env="AUDIO_BATCH_MAX_AUDIO_S")
+    use_cache: bool = Field(True, env="AUDIO_USE_CACHE")
+    cache_dir: str = Field(".audio_cache", env="AUDIO_CACHE_DIR")
+    cache_max_mb: int = Field(2048, env="AUDIO_CACHE_MAX_MB")
+    quantize_durations: bool = Field(False, env="AUDIO_QUANTIZE_DURATIONS")
+    duration_buckets: List[float] = Field(
+        default_factory=lambda: [2.0, 5.0, 10.0], env="AUDIO_DURATION_BUCKETS"
+    )
 
 class ComposerSettings(BaseSettings):
     """
@@ -90,7 +159,102 @@ class ComposerSettings(BaseSettings):
         sample_rate (int): Sample rate for final audio (env COMPOSER_SAMPLE_RATE).
         default_audio_filename (str): Default output WAV filename (env COMPOSER_AUDIO_FILENAME).
         default_video_filename (str): Default output video filename (env COMPOSER_VIDEO_FILENAME).
+        loop_clips (bool): Fit each clip to its segment length by cross-faded looping
+            or trimming (env COMPOSER_LOOP_CLIPS).
+        crossfade_s (float): Cross-fade length at loop seams in seconds (env COMPOSER_CROSSFADE_S).
+        channels (int): Channels of the final track, e.g. 1 mono, 2 stereo (env COMPOSER_CHANNELS).
+        decode_cache_size (int): Decoded clip files kept in memory between compositions
+            (env COMPOSER_DECODE_CACHE_SIZE).
+        normalize_clips (bool): RMS-normalise each clip before mixing (env COMPOSER_NORMALIZE_CLIPS).
+        target_rms_db (float): Per-clip RMS target in dBFS (env COMPOSER_TARGET_RMS_DB).
+        max_normalize_gain_db (float): Most a clip is boosted by normalisation
+            (env COMPOSER_MAX_NORMALIZE_GAIN_DB).
+        normalize_gate_db (float): Clips with RMS at or below this dBFS level are not
+            normalised (env COMPOSER_NORMALIZE_GATE_DB).
+        tag_gains_db (Dict[str, float]): Extra gain per tag in dB, JSON in env
+            (env COMPOSER_TAG_GAINS_DB).
+        fade_s (float): Fade-in/out length at segment boundaries (env COMPOSER_FADE_S).
+        limiter (bool): Look-ahead limiter on the master bus instead of a hard clip
+            (env COMPOSER_LIMITER).
+        limiter_threshold_db (float): Limiter ceiling in dBFS (env COMPOSER_LIMITER_THRESHOLD_DB).
+        limiter_lookahead_s (float): How far ahead the limiter sees peaks (env COMPOSER_LIMITER_LOOKAHEAD_S).
+        limiter_release_s (float): Gain smoothing time of the limiter (env COMPOSER_LIMITER_RELEASE_S).
+        streaming (bool): Render WAV output block by block with bounded memory
+            (env COMPOSER_STREAMING).
+        stream_block_s (float): Block length of the streaming composer in seconds
+            (env COMPOSER_STREAM_BLOCK_S).
+        mux_mode (str): "copy" to stream-copy the video with ffmpeg, "reencode" for
+            moviepy's full re-encode (env COMPOSER_MUX_MODE).
+        ffmpeg_binary (str): ffmpeg executable; empty searches PATH, then imageio-ffmpeg
+            (env COMPOSER_FFMPEG_BINARY).
+        audio_codec (str): Audio codec used by the stream-copy mux (env COMPOSER_AUDIO_CODEC).
+        audio_bitrate (str): Audio bitrate used by the stream-copy mux (env COMPOSER_AUDIO_BITRATE).
     """
     sample_rate: int = Field(44100, env="COMPOSER_SAMPLE_RATE")
     default_audio_filename: str = Field("final_output.wav", env="COMPOSER_AUDIO_FILENAME")
     default_video_filename: str = Field("final_video_with_audio.mp4", env="COMPOSER_VIDEO_FILENAME")
+    loop_clips: bool = Field(False, env="COMPOSER_LOOP_CLIPS")
+    crossfade_s: float = Field(0.05, env="COMPOSER_CROSSFADE_S")
+    channels: int = Field(2, env="COMPOSER_CHANNELS")
+    decode_cache_size: int = Field(256, env="COMPOSER_DECODE_CACHE_SIZE")
+    normalize_clips: bool = Field(True, env="COMPOSER_NORMALIZE_CLIPS")
+    target_rms_db: float = Field(-20.0, env="COMPOSER_TARGET_RMS_DB")
+    max_normalize_gain_db: float = Field(12.0, env="COMPOSER_MAX_NORMALIZE_GAIN_DB")
+    normalize_gate_db: float = Field(-60.0, env="COMPOSER_NORMALIZE_GATE_DB")
+    tag_gains_db: Dict[str, float] = Field(default_factory=dict, env="COMPOSER_TAG_GAINS_DB")
+    fade_s: float = Field(0.02, env="COMPOSER_FADE_S")
+    limiter: bool = Field(True, env="COMPOSER_LIMITER")
+    limiter_threshold_db: float = Field(-1.0, env="COMPOSER_LIMITER_THRESHOLD_DB")
+    limiter_lookahead_s: float = Field(0.005, env="COMPOSER_LIMITER_LOOKAHEAD_S")
+    limiter_release_s: float = Field(0.05, env="COMPOSER_LIMITER_RELEASE_S")
+    streaming: bool = Field(True, env="COMPOSER_STREAMING")
+    stream_block_s: float = Field(10.0, env="COMPOSER_STREAM_BLOCK_S")
+    mux_mode: str = Field("copy", env="COMPOSER_MUX_MODE")
+    ffmpeg_binary: str = Field("", env="COMPOSER_FFMPEG_BINARY")
+    audio_codec: str = Field("aac", env="COMPOSER_AUDIO_CODEC")
+    audio_bitrate: str = Field("192k", env="COMPOSER_AUDIO_BITRATE")
+
+class BatchSettings(BaseSettings):
+    """
+    Configuration for multi-video batch runs.
+
+    Attributes:
+        network_workers (int): Videos analysed/prompted concurrently (env BATCH_NETWORK_WORKERS).
+        cpu_workers (int): Threads composing and merging finished videos (env BATCH_CPU_WORKERS).
+        queue_size (int): Prepared videos that may wait for audio generation, and generated
+            videos that may wait for composing (env BATCH_QUEUE_SIZE).
+        output_dir (str): Root directory for per-video outputs (env BATCH_OUTPUT_DIR).
+        manifest_filename (str): JSONL results file inside output_dir (env BATCH_MANIFEST_FILENAME).
+    """
+    network_workers: int = Field(8, env="BATCH_NETWORK_WORKERS")
+    cpu_workers: int = Field(2, env="BATCH_CPU_WORKERS")
+    queue_size: int = Field(4, env="BATCH_QUEUE_SIZE")
+    output_dir: str = Field("batch_output", env="BATCH_OUTPUT_DIR")
+    manifest_filename: str = Field("results.jsonl", env="BATCH_MANIFEST_FILENAME")
+
+class JobSettings(BaseSettings):
+    """
+    Configuration for background jobs of the Streamlit app.
+
+    Attributes:
+        network_workers (int): Jobs analysed/prompted concurrently (env JOBS_NETWORK_WORKERS).
+        gpu_queue_size (int): Prompt groups that may wait for the shared audio model
+            (env JOBS_GPU_QUEUE_SIZE).
+        output_dir (str): Root directory for per-job clip files (env JOBS_OUTPUT_DIR).
+        poll_interval_s (float): How often the UI refreshes a running job (env JOBS_POLL_INTERVAL_S).
+    """
+    network_workers: int = Field(4, env="JOBS_NETWORK_WORKERS")
+    gpu_queue_size: int = Field(8, env="JOBS_GPU_QUEUE_SIZE")
+    output_dir: str = Field(".jobs", env="JOBS_OUTPUT_DIR")
+    poll_interval_s: float = Field(1.0, env="JOBS_POLL_INTERVAL_S")
+
+class PipelineSettings(BaseSettings):
+    """
+    Configuration for end-to-end pipeline runs.
+
+    Attributes:
+        checkpoint (bool): Persist stage outputs and resume interrupted runs (env PIPELINE_CHECKPOINT).
+        checkpoint_dir (str): Root directory of per-run work directories (env PIPELINE_CHECKPOINT_DIR).
+    """
+    checkpoint: bool = Field(True, env="PIPELINE_CHECKPOINT")
+    checkpoint_dir: str = Field(".runs", env="PIPELINE_CHECKPOINT_DIR")
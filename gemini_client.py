@@ -1,11 +1,19 @@
+import os
+import json
+import mmap
 import time
+import random
+import asyncio
+import hashlib
 import requests
 import jsonschema
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+from email.utils import parsedate_to_datetime
 from pydantic import BaseModel
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from config import GeminiSettings
+from llm_cache import LLMResponseCache
 
 class SchemaModel(BaseModel):
     """
@@ -33,16 +41,54 @@ class VideoAnalyzer:
             "Authorization": f"Bearer {settings.api_key}",
             "Content-Type": "application/json"
         })
+        self.last_upload_metrics: Dict[str, float] = {}
+        self.activation_metrics: Dict[str, Dict[str, float]] = {}
+        self.file_cache: Optional[LLMResponseCache] = None
+        self.analysis_cache: Optional[LLMResponseCache] = None
+        if settings.use_cache:
+            os.makedirs(settings.cache_dir, exist_ok=True)
+            self.file_cache = LLMResponseCache(
+                os.path.join(settings.cache_dir, "files.sqlite"),
+                settings.file_ttl_s, settings.cache_max_entries
+            )
+            self.analysis_cache = LLMResponseCache(
+                os.path.join(settings.cache_dir, "analyses.sqlite"),
+                settings.analysis_ttl_s, settings.cache_max_entries
+            )
+
+        def retrying(max_wait: int, min_wait: int = 1):
+            return retry(
+                retry=retry_if_exception_type(requests.exceptions.RequestException),
+                stop=stop_after_attempt(settings.retries),
+                wait=wait_exponential(multiplier=1, min=min_wait, max=max_wait),
+                reraise=True
+            )
+        # Each upload request is retried on its own; the chunked upload as a
+        # whole is not, as that would multiply the per-chunk attempts.
+        self._upload_file_multipart = retrying(10)(self._upload_file_multipart)
+        self._start_upload = retrying(10)(self._start_upload)
+        self._upload_status = retrying(10)(self._upload_status)
+        self._put_chunk = retrying(10)(self._put_chunk)
+        self._generate_content = retrying(60, min_wait=2)(self._generate_content)
+
+    @staticmethod
+    def _file_digest(path: str, block_size: int = 1024 * 1024) -> str:
+        """
+        Streams a file through SHA-256 without loading it into memory.
+
+        Returns:
+            str: Hex digest of the file contents.
+        """
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+        return h.hexdigest()
 
-    @retry(
-        retry=retry_if_exception_type(requests.exceptions.RequestException),
-        stop=stop_after_attempt(lambda self: self.settings.retries),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True
-    )
     def _upload_file(self, path: str) -> str:
         """
-        Uploads a video file to the Gemini /files endpoint.
+        Uploads a video file to the Gemini /files endpoint, chunked and
+        resumable when `settings.chunked_upload` is on.
 
         Args:
             path (str): Local filepath of the video.
@@ -54,6 +100,17 @@ class VideoAnalyzer:
             ValueError: If the response does not contain a file_id.
             HTTPError: On non‐200 responses.
         """
+        if self.settings.chunked_upload:
+            return self._upload_file_chunked(path)
+        return self._upload_file_multipart(path)
+
+    def _upload_file_multipart(self, path: str) -> str:
+        """
+        Uploads a video file in one multipart POST to /files.
+
+        Returns:
+            str: The uploaded file's ID.
+        """
         url = f"{self.settings.base_url}/files"
         with open(path, "rb") as f:
             resp = self.session.post(url, files={"file": f})
@@ -63,11 +120,202 @@ class VideoAnalyzer:
             raise ValueError("No file_id returned from upload endpoint.")
         return file_id
 
+    def _upload_state_path(self, path: str) -> str:
+        """
+        Location of the persisted upload state for this exact file version.
+        """
+        st = os.stat(path)
+        ident = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        name = hashlib.sha256(ident.encode("utf-8")).hexdigest()
+        return os.path.join(self.settings.upload_state_dir, f"{name}.json")
+
+    @staticmethod
+    def _save_upload_state(state_path: str, state: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        tmp = f"{state_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, state_path)
+
+    def _start_upload(self, path: str, size: int) -> Optional[str]:
+        """
+        Opens a resumable upload session.
+
+        Returns:
+            Optional[str]: Upload session ID, or None if the server does not
+                offer resumable uploads.
+        """
+        url = f"{self.settings.base_url}/files/uploads"
+        resp = self.session.post(
+            url, json={"display_name": os.path.basename(path), "size": size}
+        )
+        if resp.status_code in (404, 405):
+            return None
+        resp.raise_for_status()
+        upload_id = resp.json().get("upload_id")
+        if not upload_id:
+            raise ValueError("No upload_id returned from upload endpoint.")
+        return upload_id
+
+    def _upload_status(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Asks the server how many bytes of a session it has committed.
+
+        Returns:
+            Optional[Dict[str, Any]]: {'offset', optional 'file_id'}, or None
+                if the session no longer exists.
+        """
+        url = f"{self.settings.base_url}/files/uploads/{upload_id}"
+        resp = self.session.get(url)
+        if resp.status_code in (404, 410):
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+    def _put_chunk(
+        self, upload_id: str, data: bytes, start: int, total: int
+    ) -> Dict[str, Any]:
+        """
+        Sends one chunk; retried on its own without re-sending earlier chunks.
+
+        Returns:
+            Dict[str, Any]: Server reply with the committed 'offset' and, on the
+                last chunk, the 'file_id'.
+        """
+        url = f"{self.settings.base_url}/files/uploads/{upload_id}"
+        end = start + len(data)
+        content_range = f"bytes {start}-{end - 1}/{total}" if data else f"bytes */{total}"
+        resp = self.session.put(url, data=data, headers={
+            "Content-Type": "application/octet-stream",
+            "Content-Range": content_range
+        })
+        resp.raise_for_status()
+        return resp.json()
+
+    def _upload_file_chunked(self, path: str) -> str:
+        """
+        Uploads a video in fixed-size chunks read from a memory map.
+
+        The session ID and committed offset are persisted after every chunk,
+        so a retry, or a new process, resumes where the server left off rather
+        than from byte zero. Progress is exposed in `last_upload_metrics`.
+        Servers without the resumable endpoint get a multipart POST instead.
+
+        Args:
+            path (str): Local filepath of the video.
+
+        Returns:
+            str: The uploaded file's ID.
+        """
+        total = os.path.getsize(path)
+        chunk = self.settings.upload_chunk_mb * 1024 * 1024
+        state_path = self._upload_state_path(path)
+
+        upload_id, offset, file_id = None, 0, None
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                upload_id = json.load(f).get("upload_id")
+            status = self._upload_status(upload_id) if upload_id else None
+            if status is None:
+                upload_id = None
+            else:
+                offset = int(status.get("offset", 0))
+                file_id = status.get("file_id")
+        if upload_id is None:
+            upload_id = self._start_upload(path, total)
+            if upload_id is None:
+                return self._upload_file_multipart(path)
+        self._save_upload_state(state_path, {"upload_id": upload_id, "offset": offset})
+
+        metrics = self.last_upload_metrics = {
+            "bytes_total": total, "resumed_from": offset, "bytes_sent": 0,
+            "chunks": 0, "elapsed_s": 0.0, "throughput_mb_s": 0.0
+        }
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if total else b""
+            try:
+                while file_id is None:
+                    end = min(offset + chunk, total)
+                    reply = self._put_chunk(upload_id, mm[offset:end], offset, total)
+                    metrics["bytes_sent"] += end - offset
+                    metrics["chunks"] += 1
+                    offset = int(reply.get("offset", end))
+                    file_id = reply.get("file_id")
+                    self._save_upload_state(state_path, {"upload_id": upload_id, "offset": offset})
+
+                    elapsed = time.perf_counter() - started
+                    metrics["elapsed_s"] = elapsed
+                    if elapsed > 0:
+                        metrics["throughput_mb_s"] = metrics["bytes_sent"] / elapsed / 1e6
+                    if file_id is None and offset >= total:
+                        raise ValueError("No file_id returned after the final chunk.")
+            finally:
+                if isinstance(mm, mmap.mmap):
+                    mm.close()
+
+        os.remove(state_path)
+        return file_id
+
+    @staticmethod
+    def _retry_after(resp: requests.Response) -> Optional[float]:
+        """
+        Parses a Retry-After header given in seconds or as an HTTP date.
+
+        Returns:
+            Optional[float]: Seconds to wait, or None without a usable hint.
+        """
+        value = resp.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _is_active(resp: requests.Response) -> bool:
+        """
+        Interprets one status poll; throttling replies count as 'not yet'.
+        """
+        if resp.status_code in (429, 503):
+            return False
+        resp.raise_for_status()
+        return resp.json().get("state", "").lower() == "active"
+
+    def _poll_delay(self, base: float, resp: requests.Response) -> float:
+        """
+        Next pause: the server's Retry-After if given, else `base` with jitter.
+        """
+        hint = self._retry_after(resp)
+        if hint is not None:
+            return hint
+        jitter = self.settings.poll_jitter
+        return base * random.uniform(1 - jitter, 1 + jitter)
+
+    def _record_activation(
+        self, file_id: str, started: float, polls: int, slept: float
+    ) -> None:
+        self.activation_metrics[file_id] = {
+            "polls": polls,
+            "wait_s": time.monotonic() - started,
+            "sleep_s": slept
+        }
+
     def _wait_for_activation(self, file_id: str) -> None:
         """
         Polls the /files/{file_id}/status endpoint until the file is 'active'
         or the timeout elapses.
 
+        The first poll is immediate; later ones back off exponentially from
+        `poll_initial_s` up to `poll_max_s` with jitter, or follow the server's
+        Retry-After. Poll count and time spent waiting are stored in
+        `activation_metrics[file_id]`.
+
         Args:
             file_id (str): ID returned by _upload_file.
 
@@ -75,22 +323,64 @@ class VideoAnalyzer:
             TimeoutError: If activation does not occur within settings.timeout.
         """
         url = f"{self.settings.base_url}/files/{file_id}/status"
-        deadline = time.time() + self.settings.timeout
-        while time.time() < deadline:
+        started = time.monotonic()
+        deadline = started + self.settings.timeout
+        delay, polls, slept = self.settings.poll_initial_s, 0, 0.0
+        while True:
             resp = self.session.get(url)
-            resp.raise_for_status()
-            state = resp.json().get("state", "").lower()
-            if state == "active":
+            polls += 1
+            if self._is_active(resp):
+                self._record_activation(file_id, started, polls, slept)
                 return
-            time.sleep(2)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            pause = min(self._poll_delay(delay, resp), remaining)
+            time.sleep(pause)
+            slept += pause
+            delay = min(delay * self.settings.poll_multiplier, self.settings.poll_max_s)
+        self._record_activation(file_id, started, polls, slept)
         raise TimeoutError("Timed out waiting for video file activation.")
 
-    @retry(
-        retry=retry_if_exception_type(requests.exceptions.RequestException),
-        stop=stop_after_attempt(lambda self: self.settings.retries),
-        wait=wait_exponential(multiplier=1, min=2, max=60),
-        reraise=True
-    )
+    async def _await_activation(self, file_id: str) -> None:
+        """
+        Async variant of _wait_for_activation. Requests run in a worker thread
+        and pauses on the event loop, so many files can wait at once.
+        """
+        url = f"{self.settings.base_url}/files/{file_id}/status"
+        started = time.monotonic()
+        deadline = started + self.settings.timeout
+        delay, polls, slept = self.settings.poll_initial_s, 0, 0.0
+        while True:
+            resp = await asyncio.to_thread(self.session.get, url)
+            polls += 1
+            if self._is_active(resp):
+                self._record_activation(file_id, started, polls, slept)
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            pause = min(self._poll_delay(delay, resp), remaining)
+            await asyncio.sleep(pause)
+            slept += pause
+            delay = min(delay * self.settings.poll_multiplier, self.settings.poll_max_s)
+        self._record_activation(file_id, started, polls, slept)
+        raise TimeoutError("Timed out waiting for video file activation.")
+
+    def wait_for_activations(self, file_ids: List[str]) -> None:
+        """
+        Waits for several uploaded files concurrently on one event loop.
+
+        Args:
+            file_ids (List[str]): IDs returned by _upload_file.
+
+        Raises:
+            TimeoutError: If any file does not activate within settings.timeout.
+        """
+        async def wait_all() -> None:
+            await asyncio.gather(*(self._await_activation(f) for f in file_ids))
+        asyncio.run(wait_all())
+
     def _generate_content(self, file_id: str) -> Dict[str, Any]:
         """
         Calls Gemini's /models/generate with instructions and schema.
@@ -112,18 +402,69 @@ class VideoAnalyzer:
         resp.raise_for_status()
         return resp.json()
 
+    def _active_file_id(self, video_path: str, digest: str) -> str:
+        """
+        Returns an active file_id for the video, reusing an earlier upload of
+        identical content while it has not expired.
+
+        Args:
+            video_path (str): Path to the local silent video.
+            digest (str): Content hash from _file_digest.
+
+        Returns:
+            str: ID of an active uploaded file.
+        """
+        file_id = self.file_cache.get(digest)
+        if file_id is not None:
+            try:
+                self._wait_for_activation(file_id)
+                return file_id
+            except requests.exceptions.HTTPError as e:
+                # Deleted or expired server-side before our TTL ran out.
+                if e.response is None or e.response.status_code not in (404, 410):
+                    raise
+                self.file_cache.delete(digest)
+        file_id = self._upload_file(video_path)
+        self._wait_for_activation(file_id)
+        self.file_cache.put(digest, file_id)
+        return file_id
+
     def analyze(self, video_path: str) -> Dict[str, Any]:
         """
         Full pipeline: upload → wait → generate → schema‐validate.
 
+        With `settings.use_cache` the video is identified by a content hash:
+        an analysis already made with the same model, instructions and schema
+        is returned without any request, and an earlier upload of the same
+        content is reused instead of uploading again.
+
         Args:
             video_path (str): Path to the local silent video.
 
         Returns:
             Dict[str, Any]: Parsed, schema‐validated JSON with keys 'objects' and 'summary'.
         """
-        file_id = self._upload_file(video_path)
-        self._wait_for_activation(file_id)
+        if self.analysis_cache is None:
+            file_id = self._upload_file(video_path)
+            self._wait_for_activation(file_id)
+            raw = self._generate_content(file_id)
+            jsonschema.validate(raw, self.settings.response_schema)
+            return SchemaModel.parse_obj(raw).dict()
+
+        digest = self._file_digest(video_path)
+        key = LLMResponseCache.make_key(
+            content=digest,
+            model=self.settings.model,
+            instructions=self.settings.instructions,
+            schema=self.settings.response_schema
+        )
+        hit = self.analysis_cache.get(key)
+        if hit is not None:
+            return json.loads(hit)
+
+        file_id = self._active_file_id(video_path, digest)
         raw = self._generate_content(file_id)
         jsonschema.validate(raw, self.settings.response_schema)
-        return SchemaModel.parse_obj(raw).dict()
+        result = SchemaModel.parse_obj(raw).dict()
+        self.analysis_cache.put(key, json.dumps(result))
+        return result
@@ -0,0 +1,196 @@
+import os
+import asyncio
+import uuid
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config import JobSettings
+from pipeline import FullVideoAudioPipeline
+
+# Stages reported to the UI, in execution order.
+STAGES = ("analyze", "filter", "prompts", "audio")
+
+class AudioJob:
+    """
+    One video's analyze→filter→prompts→audio run, filled in by worker
+    threads and read by the UI through `snapshot()`.
+
+    Args:
+        video_path (str): Uploaded video.
+        output_dir (str): Directory for this job's clip files.
+    """
+    def __init__(self, video_path: str, output_dir: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.video_path = video_path
+        self.output_dir = os.path.join(output_dir, self.id)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.stages: Dict[str, str] = {stage: "pending" for stage in STAGES}
+        self.prompts: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self.timings: Dict[str, List[Any]] = {}
+        self.audio_files: Dict[str, List[str]] = {}
+        self.error: Optional[str] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def set_stage(self, stage: str, status: str) -> None:
+        with self._lock:
+            self.stages[stage] = status
+
+    def fail(self, stage: str, error: BaseException) -> None:
+        with self._lock:
+            self.stages[stage] = "error"
+            self.error = f"{type(error).__name__}: {error}"
+
+    def add_pending(self, n: int = 1) -> None:
+        with self._lock:
+            self._pending += n
+
+    def add_clips(self, files: Dict[str, List[str]]) -> None:
+        """
+        Publishes finished clip files and retires one pending work item.
+        """
+        with self._lock:
+            self.audio_files.update(files)
+            self._pending -= 1
+            if self._pending == 0 and self.stages["prompts"] == "done":
+                self.stages["audio"] = "done"
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return self.error is None and (
+                self._pending > 0 or any(s in ("pending", "running") for s in self.stages.values())
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Copy of the job state safe to read on the UI thread.
+        """
+        with self._lock:
+            return {
+                "id": self.id,
+                "stages": dict(self.stages),
+                "prompts": dict(self.prompts),
+                "durations": dict(self.durations),
+                "timings": {k: list(v) for k, v in self.timings.items()},
+                "audio_files": {k: list(v) for k, v in self.audio_files.items()},
+                "error": self.error,
+                "progress": len(self.audio_files) / max(len(self.prompts), 1),
+            }
+
+class JobManager:
+    """
+    Runs Streamlit jobs in the background on one shared pipeline.
+
+    Network stages (analysis, relevance filter, prompts) of up to
+    `network_workers` jobs run concurrently. Prompts are grouped as they
+    arrive and pushed onto one bounded queue drained by a single GPU thread,
+    the only user of the diffusion model, so all sessions share the model
+    and a full queue makes prompt producers wait instead of piling up work.
+    Finished clips are published on the job immediately.
+
+    Args:
+        pipeline (FullVideoAudioPipeline): Warm pipeline shared by all sessions.
+        settings (JobSettings): Worker and queue sizes, output location.
+    """
+    def __init__(self, pipeline: FullVideoAudioPipeline, settings: JobSettings):
+        self.pipeline = pipeline
+        self.settings = settings
+        self.jobs: Dict[str, AudioJob] = {}
+        self._network = ThreadPoolExecutor(max_workers=max(settings.network_workers, 1))
+        self._gpu_queue: "queue.Queue" = queue.Queue(maxsize=max(settings.gpu_queue_size, 1))
+        threading.Thread(target=self._gpu_worker, daemon=True).start()
+
+    def submit(self, video_path: str) -> AudioJob:
+        """
+        Starts a job for `video_path` and returns immediately.
+        """
+        job = AudioJob(video_path, self.settings.output_dir)
+        self.jobs[job.id] = job
+        self._network.submit(self._prepare, job)
+        return job
+
+    def regenerate(self, job: AudioJob, tag: str, prompt: str) -> bool:
+        """
+        Queues new clips for one tag of a finished job; like the initial
+        generation it goes through the shared GPU queue. Never blocks the
+        caller (the UI thread): when the queue is full nothing changes.
+
+        Returns:
+            bool: False if the GPU queue was full and the request was dropped.
+        """
+        # Holding the job lock keeps the GPU worker from publishing the new
+        # clips before the old ones are cleared; put_nowait cannot wait on it.
+        with job._lock:
+            try:
+                self._gpu_queue.put_nowait((job, {tag: prompt}))
+            except queue.Full:
+                return False
+            job.prompts[tag] = prompt
+            job.audio_files.pop(tag, None)
+            job._pending += 1
+        return True
+
+    def _prepare(self, job: AudioJob) -> None:
+        p = self.pipeline
+        stage = "analyze"
+        try:
+            job.set_stage(stage, "running")
+            objects = p.analyzer.analyze(job.video_path).get("objects", [])
+            job.set_stage(stage, "done")
+
+            stage = "filter"
+            job.set_stage(stage, "running")
+            labels   = [o.get("label") for o in objects]
+            tags     = p.openai.get_sound_relevant_tags(labels)
+            relevant = [o for o in objects if o.get("label") in tags]
+            with job._lock:
+                job.durations = p._extract_durations(relevant)
+                job.timings = p._extract_timings(relevant)
+            job.set_stage(stage, "done")
+
+            stage = "prompts"
+            job.set_stage(stage, "running")
+            job.set_stage("audio", "running")
+            asyncio.run(self._stream_prompts(job, relevant))
+            with job._lock:
+                job.stages["prompts"] = "done"
+                if job._pending == 0:
+                    job.stages["audio"] = "done"
+        except Exception as e:
+            job.fail(stage, e)
+
+    async def _stream_prompts(self, job: AudioJob, objects: List[Dict[str, Any]]) -> None:
+        """
+        Hands prompts to the GPU queue in groups of the audio batch size as
+        the concurrent LLM requests complete; a full queue holds back the
+        remaining requests too.
+        """
+        group: Dict[str, str] = {}
+        size = max(self.pipeline.audio.settings.batch_size, 1)
+        async for tag, prompt in self.pipeline.openai.aiter_audio_prompts(objects):
+            with job._lock:
+                job.prompts[tag] = prompt
+            group[tag] = prompt
+            if len(group) >= size:
+                job.add_pending()
+                self._gpu_queue.put((job, group))
+                group = {}
+        if group:
+            job.add_pending()
+            self._gpu_queue.put((job, group))
+
+    def _gpu_worker(self) -> None:
+        audio = self.pipeline.audio
+        while True:
+            job, group = self._gpu_queue.get()
+            try:
+                clips = audio.generate_clips_for_tags(group, job.durations)
+                job.add_clips(audio.write_clips(clips, job.output_dir))
+            except Exception as e:
+                job.fail("audio", e)
+                job.add_clips({})
@@ -0,0 +1,127 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+class LLMResponseCache:
+    """
+    SQLite-backed cache for LLM responses and per-label decisions.
+
+    Rows expire after `ttl_s` seconds. When more than `max_entries` rows are
+    stored the least recently used ones are dropped. One connection is shared
+    between threads behind a lock, which is plenty for the handful of lookups
+    a pipeline run makes.
+
+    Args:
+        path (str): SQLite database file.
+        ttl_s (float): Time-to-live per entry in seconds.
+        max_entries (int): Row cap before LRU eviction.
+    """
+    def __init__(self, path: str, ttl_s: float, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def normalize_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Collapses insignificant whitespace so cosmetic prompt edits still hit.
+        """
+        return [
+            {"role": m["role"], "content": " ".join(m["content"].split())}
+            for m in messages
+        ]
+
+    @classmethod
+    def make_key(cls, **fields: Any) -> str:
+        """
+        Hashes request fields into a stable key. A `messages` field is
+        normalised first.
+
+        Returns:
+            str: Hex SHA-256 of the JSON-encoded fields.
+        """
+        if "messages" in fields:
+            fields["messages"] = cls.normalize_messages(fields["messages"])
+        blob = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached value for `key`, or None if absent or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_s:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Stores `value` under `key` and enforces TTL and size cap.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)", (key, value, now, now)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl_s,)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def delete(self, key: str) -> None:
+        """
+        Removes `key` if present.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    def items(self, prefix: str = "") -> Dict[str, str]:
+        """
+        Returns all unexpired key→value rows whose key starts with `prefix`.
+        """
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, value FROM responses "
+                "WHERE created >= ? AND substr(key, 1, ?) = ?",
+                (cutoff, len(prefix), prefix)
+            ).fetchall()
+        return dict(rows)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: hits, misses and number of stored rows.
+        """
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+            return {"hits": self.hits, "misses": self.misses, "entries": count}
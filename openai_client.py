@@ -1,9 +1,28 @@
 import json
+import asyncio
 import openai
-from typing import List, Dict, Any
+import jsonschema
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterator, Optional, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from config import OpenAISettings
+from llm_cache import LLMResponseCache
+from sound_relevance import SoundRelevanceClassifier
+
+# Per-occurrence fields that do not change how an object sounds; dropped from
+# prompt requests so repeated objects share cache entries.
+VOLATILE_OBJECT_FIELDS = ("start_time", "end_time", "confidence")
+
+# Expected shape of a batched prompt reply: object key → non-empty prompt.
+PROMPT_MAP_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": {"type": "string", "minLength": 1}
+}
+
+# Completion budget of one <=10-word prompt.
+PROMPT_MAX_TOKENS = 20
+# Per-key allowance in a batched reply for quotes, colon, comma and spacing.
+KEY_OVERHEAD_TOKENS = 6
 
 class OpenAIClient:
     """
@@ -14,23 +33,163 @@ class OpenAIClient:
     """
     def __init__(self, settings: OpenAISettings):
         openai.api_key = settings.api_key
+        openai.api_base = settings.base_url
         self.settings = settings
+        # Retry policy is built per instance so the attempt count comes from
+        # settings; each call (and each concurrent async request) backs off on its own.
+        retrying = retry(
+            retry=retry_if_exception_type(openai.error.OpenAIError),
+            stop=stop_after_attempt(settings.retries),
+            wait=wait_exponential(multiplier=1, min=1, max=10),
+            reraise=True
+        )
+        for name in (
+            "_request_relevant_tags", "_generate_prompt", "_generate_prompt_chunk",
+            "_agenerate_prompt", "_agenerate_prompt_chunk"
+        ):
+            setattr(self, name, retrying(getattr(self, name)))
+        self.cache: Optional[LLMResponseCache] = None
+        if settings.use_cache:
+            self.cache = LLMResponseCache(
+                settings.cache_path, settings.cache_ttl_s, settings.cache_max_entries
+            )
+        self.relevance: Optional[SoundRelevanceClassifier] = None
+        if settings.use_local_relevance:
+            self.relevance = SoundRelevanceClassifier(self.cache, self._relevance_prefix())
 
-    @retry(
-        retry=retry_if_exception_type(openai.error.OpenAIError),
-        stop=stop_after_attempt(lambda self: self.settings.retries),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True
-    )
-    def get_sound_relevant_tags(self, tags: List[str]) -> List[str]:
+    def _cache_key(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        return LLMResponseCache.make_key(
+            model=self.settings.model, messages=messages, max_tokens=max_tokens
+        )
+
+    def _store(
+        self,
+        key: str,
+        resp: Any,
+        cacheable: Optional[Callable[[str], bool]]
+    ) -> str:
         """
-        Filters a list of tags to only those that produce or contribute to real sounds.
+        Extracts the reply text and caches it, unless the completion was cut
+        off at max_tokens or `cacheable` rejects it; such replies would
+        otherwise fail the same way on every later run.
+        """
+        choice = resp.choices[0]
+        text = choice.message.content.strip()
+        if self.cache is None or getattr(choice, "finish_reason", None) == "length":
+            return text
+        if cacheable is None or cacheable(text):
+            self.cache.put(key, text)
+        return text
+
+    def _chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        cacheable: Optional[Callable[[str], bool]] = None,
+        **kwargs: Any
+    ) -> str:
+        """
+        Runs a ChatCompletion, served from the response cache when possible.
 
         Args:
-            tags (List[str]): Raw labels from Gemini.
+            messages (List[Dict[str, str]]): Chat messages.
+            max_tokens (int): Completion token limit.
+            cacheable (Callable[[str], bool], optional): Whether a reply may be cached.
+            **kwargs: Extra ChatCompletion arguments (e.g. response_format).
 
         Returns:
-            List[str]: Tags capable of making sound (alone or via interaction).
+            str: Stripped message content.
+        """
+        key = self._cache_key(messages, max_tokens)
+        if self.cache is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+        resp = openai.ChatCompletion.create(
+            model=self.settings.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            timeout=self.settings.timeout,
+            **kwargs
+        )
+        return self._store(key, resp, cacheable)
+
+    async def _achat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        cacheable: Optional[Callable[[str], bool]] = None,
+        **kwargs: Any
+    ) -> str:
+        """
+        Async variant of _chat.
+        """
+        key = self._cache_key(messages, max_tokens)
+        if self.cache is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return hit
+        resp = await openai.ChatCompletion.acreate(
+            model=self.settings.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            request_timeout=self.settings.timeout,
+            **kwargs
+        )
+        return self._store(key, resp, cacheable)
+
+    def _relevance_prefix(self) -> str:
+        return f"relevance:{self.settings.model}:"
+
+    def _relevance_key(self, label: str) -> str:
+        return self._relevance_prefix() + SoundRelevanceClassifier.normalize(label)
+
+    def _known_relevance(self, label: str) -> Optional[bool]:
+        """
+        Returns a decision from the local table or the response cache, or
+        None if the label must go to the LLM.
+        """
+        if self.relevance is not None:
+            decision = self.relevance.lookup(label)
+            if decision is not None:
+                return decision
+        if self.cache is not None:
+            hit = self.cache.get(self._relevance_key(label))
+            if hit is not None:
+                return hit == "1"
+        return None
+
+    @staticmethod
+    def _object_key(obj: Dict[str, Any]) -> str:
+        key = obj["label"]
+        if obj.get("interacts_with"):
+            key += f" interacting with {obj['interacts_with']}"
+        return key
+
+    @staticmethod
+    def _object_payload(obj: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in obj.items() if k not in VOLATILE_OBJECT_FIELDS}
+
+    @staticmethod
+    def _prompt_messages(obj: Dict[str, Any]) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": (
+                "Generate a short audio prompt (<=10 words). Return only the prompt text."
+            )},
+            {"role": "user", "content": json.dumps(
+                OpenAIClient._object_payload(obj), sort_keys=True
+            )}
+        ]
+
+    def _request_relevant_tags(self, tags: List[str]) -> List[str]:
+        """
+        Asks the LLM which of `tags` produce or contribute to real sounds.
+
+        Args:
+            tags (List[str]): Labels with no cached decision.
+
+        Returns:
+            List[str]: Tags as returned by the model.
         """
         messages = [
             {"role": "system", "content": (
@@ -39,51 +198,308 @@ class OpenAIClient:
             )},
             {"role": "user", "content": f"Tags: {tags}. Return comma-separated list only."}
         ]
-        resp = openai.ChatCompletion.create(
-            model=self.settings.model,
-            messages=messages,
-            max_tokens=80,
-            timeout=self.settings.timeout
-        )
-        text = resp.choices[0].message.content.strip()
+        text = self._chat(messages, max_tokens=80)
         return [t.strip() for t in text.split(",") if t.strip()]
 
-    @retry(
-        retry=retry_if_exception_type(openai.error.OpenAIError),
-        stop=stop_after_attempt(lambda self: self.settings.retries),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        reraise=True
-    )
+    def get_sound_relevant_tags(self, tags: List[str]) -> List[str]:
+        """
+        Filters a list of tags to only those that produce or contribute to real sounds.
+
+        Labels are first resolved offline: the built-in COCO table, decisions
+        learned from earlier LLM calls, then the response cache. Only labels
+        never seen before are sent to the LLM; a video whose labels are all
+        known makes no call.
+
+        Args:
+            tags (List[str]): Raw labels from Gemini.
+
+        Returns:
+            List[str]: Tags capable of making sound (alone or via interaction).
+        """
+        unique = list(dict.fromkeys(t.strip() for t in tags if t and t.strip()))
+        decisions: Dict[str, bool] = {}
+        unknown: List[str] = []
+        for tag in unique:
+            decision = self._known_relevance(tag)
+            if decision is None:
+                unknown.append(tag)
+            else:
+                decisions[tag] = decision
+
+        if unknown:
+            relevant = {
+                SoundRelevanceClassifier.normalize(t)
+                for t in self._request_relevant_tags(unknown)
+            }
+            for tag in unknown:
+                decisions[tag] = SoundRelevanceClassifier.normalize(tag) in relevant
+                if self.relevance is not None:
+                    self.relevance.learn(tag, decisions[tag])
+                if self.cache is not None:
+                    self.cache.put(self._relevance_key(tag), "1" if decisions[tag] else "0")
+
+        return [t for t in unique if decisions[t]]
+
+    @staticmethod
+    def _keyed_objects(objects: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Maps object key → object for sound-relevant objects; a later object
+        with the same key wins, as in the per-object loop.
+        """
+        return {
+            OpenAIClient._object_key(o): o
+            for o in objects if o.get("sound_relevant", False)
+        }
+
+    def _chunks(self, keyed: Dict[str, Dict[str, Any]]) -> List[Dict[str, Dict[str, Any]]]:
+        items = list(keyed.items())
+        size = max(self.settings.prompt_batch_size, 1)
+        return [dict(items[i:i + size]) for i in range(0, len(items), size)]
+
+    @staticmethod
+    def _batch_messages(chunk: Dict[str, Dict[str, Any]]) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": (
+                "For every key in the input, generate a short audio prompt (<=10 words) "
+                "for that object. Return only a JSON object mapping each key to its prompt."
+            )},
+            {"role": "user", "content": json.dumps(
+                {k: OpenAIClient._object_payload(o) for k, o in chunk.items()},
+                sort_keys=True
+            )}
+        ]
+
+    @staticmethod
+    def _batch_max_tokens(chunk: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Completion budget of a batched reply: per key a full prompt plus the
+        echoed key (estimated at ~3 characters per token) and JSON punctuation.
+        """
+        return PROMPT_MAX_TOKENS + sum(
+            PROMPT_MAX_TOKENS + KEY_OVERHEAD_TOKENS + len(k) // 3 + 1 for k in chunk
+        )
+
+    @staticmethod
+    def _is_json_object(text: str) -> bool:
+        try:
+            return isinstance(json.loads(text), dict)
+        except json.JSONDecodeError:
+            return False
+
+    @staticmethod
+    def _parse_prompt_map(text: str, keys: List[str]) -> Dict[str, str]:
+        """
+        Parses and schema-validates a batched prompt response.
+
+        Args:
+            text (str): Raw model output, expected to be a JSON object.
+            keys (List[str]): Keys that were requested.
+
+        Returns:
+            Dict[str, str]: Valid prompts for requested keys; anything missing,
+                unrequested or invalid is left out for per-key fallback.
+        """
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            return {}
+        validator = jsonschema.Draft7Validator(PROMPT_MAP_SCHEMA)
+        invalid = set()
+        for err in validator.iter_errors(parsed):
+            if not err.path:
+                return {}
+            invalid.add(err.path[0])
+        return {
+            k: parsed[k].strip() for k in keys
+            if k in parsed and k not in invalid and parsed[k].strip()
+        }
+
+    def _generate_prompt(self, obj: Dict[str, Any]) -> str:
+        """
+        Requests a single audio prompt.
+
+        Args:
+            obj (Dict[str, Any]): Sound-relevant object.
+
+        Returns:
+            str: Prompt text.
+        """
+        return self._chat(self._prompt_messages(obj), max_tokens=PROMPT_MAX_TOKENS)
+
+    def _generate_prompt_chunk(self, chunk: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Requests prompts for several keys in one JSON-mode ChatCompletion.
+
+        Args:
+            chunk (Dict[str, Dict[str, Any]]): key→object.
+
+        Returns:
+            Dict[str, str]: Valid prompts returned for the chunk's keys.
+        """
+        text = self._chat(
+            self._batch_messages(chunk),
+            max_tokens=self._batch_max_tokens(chunk),
+            cacheable=self._is_json_object,
+            response_format={"type": "json_object"}
+        )
+        return self._parse_prompt_map(text, list(chunk))
+
     def generate_audio_prompts_from_objects(
         self, objects: List[Dict[str, Any]]
     ) -> Dict[str, str]:
         """
         Generates short (<=10 words) prompts for each sound‐relevant object.
 
+        With `settings.batch_prompts` all unique keys are sent in chunks of
+        `prompt_batch_size` per request, and only keys missing or invalid in
+        the JSON reply are retried one by one.
+
         Args:
             objects (List[Dict[str, Any]]): Each dict must include 'label', optional 'interacts_with', etc.
 
         Returns:
             Dict[str, str]: Mapping from object key to prompt string.
         """
-        prompts: Dict[str, str] = {}
-        for obj in objects:
-            if not obj.get("sound_relevant", False):
-                continue
-            key = obj["label"]
-            if obj.get("interacts_with"):
-                key += f" interacting with {obj['interacts_with']}"
-            messages = [
-                {"role": "system", "content": (
-                    "Generate a short audio prompt (<=10 words). Return only the prompt text."
-                )},
-                {"role": "user", "content": json.dumps(obj)}
-            ]
-            resp = openai.ChatCompletion.create(
-                model=self.settings.model,
-                messages=messages,
-                max_tokens=20,
-                timeout=self.settings.timeout
-            )
-            prompts[key] = resp.choices[0].message.content.strip()
-        return prompts
+        found = dict(self.iter_audio_prompts(objects))
+        return {key: found[key] for key in self._keyed_objects(objects)}
+
+    def iter_audio_prompts(
+        self, objects: List[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (key, prompt) pairs as soon as each request returns, so a
+        consumer can start on early prompts. Requests run one at a time; see
+        aiter_audio_prompts for the concurrent version.
+
+        Args:
+            objects (List[Dict[str, Any]]): Each dict must include 'label', optional 'interacts_with', etc.
+
+        Yields:
+            Tuple[str, str]: Object key and its prompt.
+        """
+        keyed = self._keyed_objects(objects)
+        if not self.settings.batch_prompts:
+            for key, obj in keyed.items():
+                yield key, self._generate_prompt(obj)
+            return
+
+        missing: List[str] = []
+        for chunk in self._chunks(keyed):
+            found = self._generate_prompt_chunk(chunk)
+            for key in chunk:
+                if key in found:
+                    yield key, found[key]
+                else:
+                    missing.append(key)
+        for key in missing:
+            yield key, self._generate_prompt(keyed[key])
+
+    async def _agenerate_prompt(self, obj: Dict[str, Any]) -> str:
+        """
+        Requests a single audio prompt; retried independently of other objects.
+
+        Args:
+            obj (Dict[str, Any]): Sound-relevant object.
+
+        Returns:
+            str: Prompt text.
+        """
+        return await self._achat(self._prompt_messages(obj), max_tokens=PROMPT_MAX_TOKENS)
+
+    async def _agenerate_prompt_chunk(
+        self, chunk: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Async variant of _generate_prompt_chunk.
+        """
+        text = await self._achat(
+            self._batch_messages(chunk),
+            max_tokens=self._batch_max_tokens(chunk),
+            cacheable=self._is_json_object,
+            response_format={"type": "json_object"}
+        )
+        return self._parse_prompt_map(text, list(chunk))
+
+    async def aiter_audio_prompts(
+        self, objects: List[Dict[str, Any]]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Async variant of iter_audio_prompts.
+
+        Requests run concurrently, at most `settings.max_concurrency` at a
+        time, each with its own retry/backoff, and every (key, prompt) pair is
+        yielded as soon as its request completes. With `settings.batch_prompts`
+        keys missing from a chunk's reply are requested one by one as soon as
+        that chunk returns, while other chunks are still in flight. Requests
+        still running when the consumer stops are cancelled.
+
+        Args:
+            objects (List[Dict[str, Any]]): Each dict must include 'label', optional 'interacts_with', etc.
+
+        Yields:
+            Tuple[str, str]: Object key and its prompt, in completion order.
+        """
+        semaphore = asyncio.Semaphore(max(self.settings.max_concurrency, 1))
+        keyed = self._keyed_objects(objects)
+
+        async def prompt_chunk(chunk: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+            async with semaphore:
+                return await self._agenerate_prompt_chunk(chunk)
+
+        async def prompt(key: str) -> Dict[str, str]:
+            async with semaphore:
+                return {key: await self._agenerate_prompt(keyed[key])}
+
+        pending: Dict["asyncio.Future[Dict[str, str]]", List[str]] = {}
+        if self.settings.batch_prompts:
+            for chunk in self._chunks(keyed):
+                pending[asyncio.ensure_future(prompt_chunk(chunk))] = list(chunk)
+        else:
+            for key in keyed:
+                pending[asyncio.ensure_future(prompt(key))] = [key]
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    keys = pending.pop(task)
+                    found = task.result()
+                    for key in keys:
+                        if key in found:
+                            yield key, found[key]
+                        else:
+                            pending[asyncio.ensure_future(prompt(key))] = [key]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def agenerate_audio_prompts_from_objects(
+        self, objects: List[Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Async variant of generate_audio_prompts_from_objects, collecting
+        aiter_audio_prompts. The result keeps the order of `objects`, and as
+        in the sequential version a later object with the same key wins.
+
+        Args:
+            objects (List[Dict[str, Any]]): Each dict must include 'label', optional 'interacts_with', etc.
+
+        Returns:
+            Dict[str, str]: Mapping from object key to prompt string.
+        """
+        found = {key: prompt async for key, prompt in self.aiter_audio_prompts(objects)}
+        return {key: found[key] for key in self._keyed_objects(objects)}
+
+    def generate_audio_prompts_concurrently(
+        self, objects: List[Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Synchronous wrapper around agenerate_audio_prompts_from_objects for
+        callers without an event loop (pipeline, Streamlit script thread).
+
+        Args:
+            objects (List[Dict[str, Any]]): Sound-relevant objects.
+
+        Returns:
+            Dict[str, str]: Mapping from object key to prompt string.
+        """
+        return asyncio.run(self.agenerate_audio_prompts_from_objects(objects))
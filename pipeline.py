@@ -1,13 +1,24 @@
+import os
 import cv2
-from typing import List, Dict, Any, Tuple
+import time
+import asyncio
+import queue
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Callable, Optional
 
 from config import (
-    GeminiSettings, OpenAISettings, StableAudioSettings, ComposerSettings
+    GeminiSettings, OpenAISettings, StableAudioSettings, ComposerSettings,
+    PipelineSettings
 )
+from checkpoint import RunCheckpoint
 from gemini_client import VideoAnalyzer
 from openai_client import OpenAIClient
-from audio_client import StableAudioClient
-from composer import AudioComposer
+from audio_generation import StableAudioClient
+from composer import AudioComposer, ClipSource
+
+# Marks the end of the prompt stream between producer and consumer.
+_DONE = object()
 
 class FullVideoAudioPipeline:
     """
@@ -18,18 +29,29 @@ class FullVideoAudioPipeline:
         openai_settings (OpenAISettings)
         audio_settings (StableAudioSettings)
         composer_settings (ComposerSettings)
+        pipeline_settings (PipelineSettings, optional): Checkpointing options.
     """
     def __init__(
         self,
         gemini_settings: GeminiSettings,
         openai_settings: OpenAISettings,
         audio_settings: StableAudioSettings,
-        composer_settings: ComposerSettings
+        composer_settings: ComposerSettings,
+        pipeline_settings: Optional[PipelineSettings] = None
     ):
+        if audio_settings.quantize_durations and not composer_settings.loop_clips:
+            # Bucketed clips only cover their segments when the composer fits them.
+            raise ValueError(
+                "AUDIO_QUANTIZE_DURATIONS requires COMPOSER_LOOP_CLIPS=true: bucketed "
+                "clips would otherwise overrun short segments and cut long ones short."
+            )
+        self.settings = pipeline_settings or PipelineSettings()
         self.analyzer = VideoAnalyzer(gemini_settings)
         self.openai   = OpenAIClient(openai_settings)
         self.audio    = StableAudioClient(audio_settings)
         self.composer = AudioComposer(composer_settings)
+        self.stage_timings: Dict[str, Tuple[float, float]] = {}
+        self._t0 = time.perf_counter()
 
     @staticmethod
     def _extract_durations(
@@ -82,10 +104,157 @@ class FullVideoAudioPipeline:
         cap.release()
         return frames / fps
 
+    def _checkpoint(self, video_path: str) -> RunCheckpoint:
+        """
+        Opens the work directory for this input and configuration.
+
+        The run id hashes the video contents together with every setting
+        that changes the output, so a re-run with the same inputs resumes
+        and a changed setting starts a fresh run.
+        """
+        if not self.settings.checkpoint:
+            return RunCheckpoint(None, "")
+        settings = {
+            "gemini":   self.analyzer.settings.dict(exclude={"api_key"}),
+            "openai":   self.openai.settings.dict(exclude={"api_key"}),
+            "audio":    self.audio.settings.dict(),
+            "composer": self.composer.settings.dict(),
+        }
+        run_id = RunCheckpoint.make_run_id(self.analyzer._file_digest(video_path), settings)
+        return RunCheckpoint(self.settings.checkpoint_dir, run_id)
+
+    def _stage(
+        self, ckpt: RunCheckpoint, stage: str, fn: Callable, *args: Any
+    ) -> Any:
+        """
+        Returns the checkpointed output of `stage`, or runs, times and
+        checkpoints it.
+        """
+        saved = ckpt.load(stage)
+        if saved is not None:
+            return saved
+        result = self._timed(stage, fn, *args)
+        ckpt.save(stage, result)
+        return result
+
+    def _mark(self, stage: str, start: float) -> None:
+        """
+        Records a stage as (start, end) seconds since the run began.
+        """
+        self.stage_timings[stage] = (start - self._t0, time.perf_counter() - self._t0)
+
+    def _timed(self, stage: str, fn: Callable, *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._mark(stage, start)
+
+    def _produce_prompts(
+        self,
+        objects: List[Dict[str, Any]],
+        out: "queue.Queue",
+        ckpt: RunCheckpoint
+    ) -> None:
+        """
+        Streams (tag, prompt) pairs into `out` as the concurrent LLM requests
+        complete and checkpoints the full set once complete. Always ends the
+        stream with _DONE, also on error.
+        """
+        start = time.perf_counter()
+        prompts: Dict[str, str] = {}
+
+        async def produce() -> None:
+            async for tag, prompt in self.openai.aiter_audio_prompts(objects):
+                prompts[tag] = prompt
+                out.put((tag, prompt))
+
+        try:
+            asyncio.run(produce())
+            ckpt.save("prompts", prompts)
+        finally:
+            out.put(_DONE)
+            self._mark("prompts", start)
+
+    def _consume_prompts(
+        self,
+        prompts_in: "queue.Queue",
+        durations: Dict[str, float],
+        ckpt: RunCheckpoint
+    ) -> Tuple[Dict[str, str], Dict[str, List[ClipSource]]]:
+        """
+        Generates audio while prompts are still arriving.
+
+        Each round takes everything queued so far (at least one prompt) and
+        hands it to generate_clips_for_tags as one batch, so generation
+        overlaps the LLM calls and still batches when prompts arrive faster
+        than the model can keep up. Clips stay in memory for the composer;
+        with checkpointing they are also written to the run's work directory
+        and the clip list is saved after every round, and tags already
+        checkpointed are not generated again.
+
+        Returns:
+            Tuple[Dict[str, str], Dict[str, List[ClipSource]]]: tag→prompt, tag→clips.
+        """
+        prompts: Dict[str, str] = {}
+        saved: Dict[str, List[str]] = {
+            tag: files for tag, files in (ckpt.load("clips") or {}).items()
+            if all(os.path.exists(f) for f in files)
+        }
+        clips_map: Dict[str, List[ClipSource]] = dict(saved)
+        clips_dir = ckpt.path("clips")
+        if clips_dir:
+            os.makedirs(clips_dir, exist_ok=True)
+        start, done = None, False
+        while not done:
+            batch = [prompts_in.get()]
+            while True:
+                try:
+                    batch.append(prompts_in.get_nowait())
+                except queue.Empty:
+                    break
+            items = [b for b in batch if b is not _DONE]
+            done = len(items) < len(batch)
+            prompts.update(items)
+            group = {tag: p for tag, p in items if tag not in clips_map}
+            if not group:
+                continue
+            start = start or time.perf_counter()
+            generated = self.audio.generate_clips_for_tags(group, durations)
+            clips_map.update(generated)
+            if clips_dir:
+                saved.update(self.audio.write_clips(generated, clips_dir))
+                ckpt.save("clips", saved)
+        if start is not None:
+            self._mark("audio", start)
+        return prompts, clips_map
+
+    def format_stage_timings(self) -> str:
+        """
+        Renders the last run's stages as a timeline, earliest first.
+
+        Returns:
+            str: One 'stage  start→end (duration)' line per stage.
+        """
+        lines = []
+        for stage, (s, e) in sorted(self.stage_timings.items(), key=lambda x: x[1][0]):
+            lines.append(f"{stage:<10} {s:8.2f}s → {e:8.2f}s ({e - s:.2f}s)")
+        return "\n".join(lines)
+
     def run(self, video_path: str, output_video: str) -> str:
         """
         End‐to‐end pipeline execution.
 
+        Stages overlap where they are independent: the video duration is
+        probed while Gemini analyses the video, and audio generation consumes
+        prompts from a queue while later prompts are still being requested.
+        Per-stage (start, end) times are kept in `stage_timings`.
+
+        With checkpointing on, every stage's output (analysis, tags, plan,
+        prompts, clips, composed WAV, final video) is saved in a work
+        directory keyed by the input hash and settings, and a re-run resumes
+        after the last completed stage.
+
         Args:
             video_path (str): Path to input silent video.
             output_video (str): Desired MP4 output.
@@ -93,25 +262,65 @@ class FullVideoAudioPipeline:
         Returns:
             str: Path to the final merged video.
         """
-        # 1️⃣ Gemini analysis
-        res     = self.analyzer.analyze(video_path)
-        objects = res["objects"]
+        self._t0 = time.perf_counter()
+        self.stage_timings = {}
+        ckpt = self._checkpoint(video_path)
+        merged = ckpt.load("merge")
+        if merged == output_video and os.path.exists(merged):
+            return merged
 
-        # 2️⃣ Filter sound‐relevant
-        labels     = [o["label"] for o in objects]
-        tags       = self.openai.get_sound_relevant_tags(labels)
-        relevant   = [o for o in objects if o["label"] in tags]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # 1️⃣ Gemini analysis, with duration probing alongside
+            vd_future = pool.submit(self._timed, "probe", self._get_video_duration, video_path)
+            res     = self._stage(ckpt, "analyze", self.analyzer.analyze, video_path)
+            objects = res["objects"]
 
-        # 3️⃣ Prompt & durations
-        prompts   = self.openai.generate_audio_prompts_from_objects(relevant)
-        durations = self._extract_durations(relevant)
-        timings   = self._extract_timings(relevant)
+            # 2️⃣ Filter sound‐relevant
+            labels     = [o["label"] for o in objects]
+            tags       = self._stage(ckpt, "filter", self.openai.get_sound_relevant_tags, labels)
+            relevant   = [o for o in objects if o["label"] in tags]
+            plan       = self._stage(ckpt, "plan", lambda: {
+                "durations": self._extract_durations(relevant),
+                "timings":   self._extract_timings(relevant),
+            })
+            durations, timings = plan["durations"], plan["timings"]
 
-        # 4️⃣ Generate audio
-        files_map = self.audio.generate_audio_for_tags(prompts, durations)
+            # 3️⃣+4️⃣ Prompts streamed into audio generation
+            prompts_q: "queue.Queue" = queue.Queue()
+            saved_prompts = ckpt.load("prompts")
+            if saved_prompts is None:
+                producer = pool.submit(self._produce_prompts, relevant, prompts_q, ckpt)
+            else:
+                for item in saved_prompts.items():
+                    prompts_q.put(item)
+                prompts_q.put(_DONE)
+            _, clips_map = self._consume_prompts(prompts_q, durations, ckpt)
+            if saved_prompts is None:
+                producer.result()
+            vd = vd_future.result()
 
         # 5️⃣ Compose & merge
-        vd     = self._get_video_duration(video_path)
-        wav    = self.composer.compose_final_audio(files_map, timings, vd)
-        final  = self.composer.merge_audio_with_video(video_path, wav, output_video)
+        # Without checkpointing the WAV is a work file next to the output, so
+        # COMPOSER_STREAMING keeps memory bounded on this path as well.
+        work_wav = None
+        wav = ckpt.load("compose")
+        if wav is None or not os.path.exists(wav):
+            target = ckpt.path("audio.wav")
+            if not target:
+                fd, work_wav = tempfile.mkstemp(
+                    suffix=".wav", dir=os.path.dirname(os.path.abspath(output_video))
+                )
+                os.close(fd)
+                target = work_wav
+            wav = self._timed("compose", self.composer.compose_final_audio,
+                              clips_map, timings, vd, target)
+            ckpt.save("compose", wav)
+        try:
+            final  = self._timed("merge", self.composer.merge_audio_with_video,
+                                 video_path, wav, output_video)
+        finally:
+            if work_wav is not None:
+                os.remove(work_wav)
+        ckpt.save("merge", final)
+        print(f"[INFO] Stage timings:\n{self.format_stage_timings()}")
         return final
@@ -0,0 +1,60 @@
+from typing import Dict, Optional
+
+from llm_cache import LLMResponseCache
+
+# Whether each of the 80 COCO classes emitted by YOLOv8 makes a recognisable sound.
+COCO_SOUND_RELEVANCE: Dict[str, bool] = {
+    "person": True, "bicycle": True, "car": True, "motorcycle": True,
+    "airplane": True, "bus": True, "train": True, "truck": True, "boat": True,
+    "traffic light": False, "fire hydrant": False, "stop sign": False,
+    "parking meter": False, "bench": False, "bird": True, "cat": True,
+    "dog": True, "horse": True, "sheep": True, "cow": True, "elephant": True,
+    "bear": True, "zebra": True, "giraffe": False, "backpack": False,
+    "umbrella": False, "handbag": False, "tie": False, "suitcase": False,
+    "frisbee": False, "skis": True, "snowboard": True, "sports ball": True,
+    "kite": False, "baseball bat": True, "baseball glove": False,
+    "skateboard": True, "surfboard": True, "tennis racket": True,
+    "bottle": False, "wine glass": True, "cup": False, "fork": False,
+    "knife": False, "spoon": False, "bowl": False, "banana": False,
+    "apple": False, "sandwich": False, "orange": False, "broccoli": False,
+    "carrot": False, "hot dog": False, "pizza": False, "donut": False,
+    "cake": False, "chair": False, "couch": False, "potted plant": False,
+    "bed": False, "dining table": False, "toilet": True, "tv": True,
+    "laptop": True, "mouse": False, "remote": False, "keyboard": True,
+    "cell phone": True, "microwave": True, "oven": True, "toaster": True,
+    "sink": True, "refrigerator": True, "book": False, "clock": True,
+    "vase": False, "scissors": True, "teddy bear": False, "hair drier": True,
+    "toothbrush": True,
+}
+
+class SoundRelevanceClassifier:
+    """
+    Offline sound-relevance lookup used before asking the LLM.
+
+    Decisions come from the built-in COCO table and from per-label decisions
+    the LLM made earlier (stored in the response cache under `prefix`).
+    Learned decisions override the table.
+
+    Args:
+        cache (LLMResponseCache, optional): Source of learned decisions.
+        prefix (str): Key prefix of per-label decisions in the cache.
+    """
+    def __init__(self, cache: Optional[LLMResponseCache] = None, prefix: str = ""):
+        self.table: Dict[str, bool] = dict(COCO_SOUND_RELEVANCE)
+        if cache is not None:
+            for key, value in cache.items(prefix).items():
+                self.table[key[len(prefix):]] = value == "1"
+
+    @staticmethod
+    def normalize(label: str) -> str:
+        return " ".join(label.lower().replace("_", " ").split())
+
+    def lookup(self, label: str) -> Optional[bool]:
+        """
+        Returns:
+            Optional[bool]: Known decision for `label`, or None if never seen.
+        """
+        return self.table.get(self.normalize(label))
+
+    def learn(self, label: str, relevant: bool) -> None:
+        self.table[self.normalize(label)] = relevant
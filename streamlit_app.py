@@ -1,39 +1,34 @@
 import streamlit as st
+import os
 import tempfile
-import json
-import cv2
-from moviepy.editor import VideoFileClip, AudioFileClip
+import time
 
-
-# Initialize pipeline
-pipeline = FullVideoAudioPipeline(
-    GeminiSettings(),
-    OpenAISettings(),
-    StableAudioSettings(),
-    ComposerSettings()
-)
-
-# Import the pipeline and settings classes
-from your_module import (
+from config import (
     GeminiSettings,
     OpenAISettings,
     StableAudioSettings,
     ComposerSettings,
-    FullVideoAudioPipeline,
+    JobSettings,
 )
+from pipeline import FullVideoAudioPipeline
+from composer import StemMixer
+from jobs import JobManager, STAGES
 
-# === Initialize Pipeline ===
-gemini_settings   = GeminiSettings()
-openai_settings   = OpenAISettings()
-audio_settings    = StableAudioSettings()
-composer_settings = ComposerSettings()
-
-pipeline = FullVideoAudioPipeline(
-    gemini_settings,
-    openai_settings,
-    audio_settings,
-    composer_settings
-)
+
+# === Shared Pipeline & Jobs ===
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """
+    One warm pipeline (and diffusion model) and one GPU queue for every
+    session and rerun of this server.
+    """
+    pipeline = FullVideoAudioPipeline(
+        GeminiSettings(),
+        OpenAISettings(),
+        StableAudioSettings(),
+        ComposerSettings()
+    )
+    return JobManager(pipeline, JobSettings())
 
 # === Page Style & Config ===
 st.set_page_config(page_title="🎥🔊 AI Audio Companion", layout="wide")
@@ -53,18 +48,21 @@ st.markdown(
 st.markdown('<div class="centered-title">🎬 Audio Accompanying System for Silent Videos</div>', unsafe_allow_html=True)
 st.markdown('<div class="centered-sub">Upload your silent video, analyze objects, and generate realistic visual sounds with automatic final video assembly.</div>', unsafe_allow_html=True)
 
+manager  = get_job_manager()
+pipeline = manager.pipeline
+
 # === Session State Init ===
 for key, default in {
-    "audio_prompts": {},
-    "audio_files": {},
-    "durations": {},
-    "timings": {},
-    "gemini_objects": [],
+    "job_id": "",
+    "upload_name": "",
     "video_path": ""
 }.items():
     if key not in st.session_state:
         st.session_state[key] = default
 
+job  = manager.jobs.get(st.session_state.job_id)
+snap = job.snapshot() if job else None
+
 # === Main Layout ===
 left_col, right_col = st.columns([1.2, 2], gap="large")
 
@@ -72,71 +70,69 @@ with left_col:
     st.markdown("### 📤 Upload Silent Video")
     uploaded = st.file_uploader("", type=["mp4","mov","avi"])
     if uploaded:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-            tmp.write(uploaded.read())
-            st.session_state.video_path = tmp.name
-            st.video(tmp.name)
-
-    if st.button("🔊 Analyze Video and Generate Audios"):
+        # Reruns poll running jobs, so only write the upload once
+        if uploaded.name != st.session_state.upload_name:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
+                tmp.write(uploaded.read())
+                st.session_state.video_path = tmp.name
+                st.session_state.upload_name = uploaded.name
+        st.video(st.session_state.video_path)
+
+    if st.button("🔊 Analyze Video and Generate Audios", disabled=bool(job and job.busy)):
         if not st.session_state.video_path:
             st.warning("Please upload a video first.")
         else:
-            with st.spinner("🔍 Processing... this may take a while..."):
-                # Run full analysis pipeline up to raw objects
-                result = pipeline.analyzer.analyze(st.session_state.video_path)
-                objects = result.get("objects", [])
-
-                # Filter relevant
-                labels     = [o.get("label") for o in objects]
-                sound_tags = pipeline.openai.get_sound_relevant_tags(labels)
-                relevant   = [o for o in objects if o.get("label") in sound_tags]
-                st.session_state.gemini_objects = relevant
-
-                # Prompts and audio
-                prompts = pipeline.openai.generate_audio_prompts_from_objects(relevant)
-                durations_map = pipeline._extract_durations(relevant)
-                timings_map   = pipeline._extract_timings(relevant)
-                audio_files = pipeline.audio.generate_audio_for_tags(prompts, durations_map)
-
-                # Store state
-                st.session_state.audio_prompts = prompts
-                st.session_state.durations    = durations_map
-                st.session_state.timings      = timings_map
-                st.session_state.audio_files  = audio_files
+            job = manager.submit(st.session_state.video_path)
+            st.session_state.job_id = job.id
+            st.session_state.pop("mixer", None)
+            snap = job.snapshot()
+
+    if snap:
+        icons = {"pending": "⏳", "running": "🔄", "done": "✅", "error": "❌"}
+        for stage in STAGES:
+            st.markdown(f"{icons[snap['stages'][stage]]} {stage.capitalize()}")
+        st.progress(snap["progress"])
+        if snap["error"]:
+            st.error(snap["error"])
 
 with right_col:
-    if st.session_state.audio_files:
+    if snap and snap["prompts"]:
         st.markdown("### 🎧 Generated Audios with Prompts")
-        for key, files in st.session_state.audio_files.items():
+        for key, prompt in snap["prompts"].items():
             st.subheader(f"🎯 Object: {key}")
             pcol, rcol = st.columns([3,1])
             with pcol:
-                new_p = st.text_input(f"Prompt for {key}", value=st.session_state.audio_prompts[key], key=f"prompt_{key}")
-                st.session_state.audio_prompts[key] = new_p
+                new_p = st.text_input(f"Prompt for {key}", value=prompt, key=f"prompt_{key}")
             with rcol:
-                if st.button("🔁 Regenerate", key=f"regen_{key}"):
-                    dur = st.session_state.durations.get(key, 3.0)
-                    new_files = pipeline.audio.generate_audio_files(key, new_p, dur)
-                    st.session_state.audio_files[key] = new_files
+                if st.button("🔁 Regenerate", key=f"regen_{key}", disabled=key not in snap["audio_files"]):
+                    if not manager.regenerate(job, key, new_p):
+                        st.warning("⏳ The audio queue is busy, please try again in a moment.")
 
-            for f in files:
-                st.audio(f)
+            files = snap["audio_files"].get(key)
+            if files:
+                for f in files:
+                    st.audio(f)
+            else:
+                st.caption("🎛️ Generating...")
 
 # === Compose & Merge ===
-if st.session_state.audio_files:
+if snap and snap["audio_files"]:
     st.markdown('<div class="full-width-button">', unsafe_allow_html=True)
-    if st.button("🎼 Compose Final Audio & Merge with Video"):
+    if st.button("🎼 Compose Final Audio & Merge with Video", disabled=job.busy):
         with st.spinner("🎛️ Composing & merging..."):
-            vd = pipeline._get_video_duration(st.session_state.video_path)
-            audio_path = pipeline.composer.compose_final_audio(
-                st.session_state.audio_files,
-                st.session_state.timings,
+            # Per-tag stems: after a single regenerate only that tag is remixed
+            if "mixer" not in st.session_state:
+                st.session_state.mixer = StemMixer(pipeline.composer)
+            vd = pipeline._get_video_duration(job.video_path)
+            track = st.session_state.mixer.mix(
+                snap["audio_files"],
+                snap["timings"],
                 vd
             )
             final_video = pipeline.composer.merge_audio_with_video(
-                st.session_state.video_path,
-                audio_path,
-                output_path="final_with_audio.mp4"
+                job.video_path,
+                track,
+                output_path=os.path.join(job.output_dir, "final_with_audio.mp4")
             )
             st.success("✅ Final video ready!")
     st.markdown('</div>', unsafe_allow_html=True)
@@ -152,4 +148,9 @@ if st.session_state.audio_files:
                     data=vid,
                     file_name="final_with_audio.mp4",
                     mime="video/mp4"
-                )
\ No newline at end of file
+                )
+
+# === Poll Running Job ===
+if job and job.busy:
+    time.sleep(manager.settings.poll_interval_s)
+    st.rerun()